@@ -0,0 +1,70 @@
+import asyncio
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+
+from bot.config import Settings
+from bot.handlers import router
+from bot.keyboards.registry import shared_keyboard
+from bot.utils.fsm_storage import create_event_isolation, create_fsm_storage
+from bot.utils.loader import preload_content, watch_content
+from bot.utils.metrics import ApiTimer, UpdateTimer, metrics, name_handler, start_metrics_server
+from bot.utils.persistence import io_worker, run_io
+from bot.utils.rate_limiter import GLOBAL_RATE, OutboundRateLimiter
+from bot.utils.stats_aggregator import get_stats_aggregator
+from bot.utils.stats_store import get_stats_store
+
+
+async def on_startup(dispatcher: Dispatcher, settings: Settings) -> None:
+    preload_content()
+    shared_keyboard.build_all()
+    await run_io(get_stats_store)
+
+    stats_aggregator = get_stats_aggregator()
+    await stats_aggregator.load_leaderboard()
+    stats_aggregator.start()
+    dispatcher["content_watcher"] = asyncio.create_task(watch_content())
+    if settings.metrics_port:
+        dispatcher["metrics_server"] = await start_metrics_server(settings.metrics_host, settings.metrics_port)
+
+
+async def on_shutdown(dispatcher: Dispatcher) -> None:
+    dispatcher["content_watcher"].cancel()
+    metrics_server = dispatcher.get("metrics_server")
+    if metrics_server is not None:
+        await metrics_server.cleanup()
+    await get_stats_aggregator().close()
+    await io_worker.close()
+
+
+def create_bot(settings: Settings, session: Optional[BaseSession] = None) -> Bot:
+    bot = Bot(
+        token=settings.bot_token,
+        session=session,
+        default=DefaultBotProperties(parse_mode="HTML"),
+    )
+    # Registered first, so API time includes waiting for the rate limiter.
+    bot.session.middleware(ApiTimer())
+    if settings.rate_limit:
+        # Worker processes share one bot token, so they split the global limit.
+        limiter = OutboundRateLimiter(global_rate=GLOBAL_RATE / settings.workers)
+        bot.session.middleware(limiter)
+        metrics.add_collector("rate_limiter", limiter.metrics)
+    return bot
+
+
+def create_dispatcher(settings: Settings) -> Dispatcher:
+    storage = create_fsm_storage(settings)
+    dp = Dispatcher(storage=storage, events_isolation=create_event_isolation(storage), settings=settings)
+    dp.update.outer_middleware(UpdateTimer())
+    dp.message.middleware(name_handler)
+    dp.callback_query.middleware(name_handler)
+    metrics.add_collector("io_worker", io_worker.metrics)
+    if hasattr(storage, "metrics"):
+        metrics.add_collector("fsm", storage.metrics)
+    dp.include_router(router)
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    return dp
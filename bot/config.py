@@ -0,0 +1,98 @@
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+BOT_MODES = ("polling", "webhook")
+FSM_STORAGES = ("memory", "sqlite", "redis")
+
+
+@dataclass(frozen=True)
+class Settings:
+    bot_token: str
+    fsm_storage: str = "memory"
+    # Seconds of inactivity after which a stored FSM session is dropped.
+    fsm_ttl: int = 24 * 60 * 60
+    # Hard cap on live sessions for the memory storage (0 disables it).
+    fsm_max_sessions: int = 50_000
+    redis_url: str = "redis://localhost:6379/0"
+    bot_mode: str = "polling"
+    # Public base URL Telegram should call; leave empty to skip setWebhook
+    # (e.g. when POSTing recorded updates locally).
+    webhook_url: str = ""
+    webhook_path: str = "/webhook"
+    webhook_secret: str = ""
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    # Worker processes; above 1 updates are sharded across them by user id.
+    workers: int = 1
+    # Pace outbound messages to stay under Telegram's flood limits.
+    rate_limit: bool = True
+    # Show each verdict and the next question by editing one message.
+    quiz_compact: bool = False
+    # Local port for /metrics (Prometheus) and /metrics.json; 0 disables it.
+    # Worker processes listen on consecutive ports starting from this one.
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RuntimeError(f"{name} must be an integer, got {value!r}") from None
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return default
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    raise RuntimeError(f"{name} must be a boolean, got {value!r}")
+
+
+def _env_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    value = os.getenv(name, "").strip().lower() or default
+    if value not in choices:
+        raise RuntimeError(f"{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+
+def load_settings() -> Settings:
+    load_dotenv()
+    token = os.getenv("BOT_TOKEN")
+    if not token:
+        raise RuntimeError("BOT_TOKEN not set in .env")
+
+    bot_mode = _env_choice("BOT_MODE", Settings.bot_mode, BOT_MODES)
+    webhook_secret = os.getenv("WEBHOOK_SECRET", "").strip()
+    if bot_mode == "webhook" and not webhook_secret:
+        raise RuntimeError("WEBHOOK_SECRET must be set when BOT_MODE=webhook")
+    workers = _env_int("WORKERS", Settings.workers)
+    if workers < 1:
+        raise RuntimeError(f"WORKERS must be at least 1, got {workers}")
+
+    return Settings(
+        bot_token=token,
+        fsm_storage=_env_choice("FSM_STORAGE", Settings.fsm_storage, FSM_STORAGES),
+        fsm_ttl=_env_int("FSM_TTL", Settings.fsm_ttl),
+        fsm_max_sessions=_env_int("FSM_MAX_SESSIONS", Settings.fsm_max_sessions),
+        redis_url=os.getenv("REDIS_URL", "").strip() or Settings.redis_url,
+        bot_mode=bot_mode,
+        webhook_url=os.getenv("WEBHOOK_URL", "").strip().rstrip("/"),
+        webhook_path=os.getenv("WEBHOOK_PATH", "").strip() or Settings.webhook_path,
+        webhook_secret=webhook_secret,
+        webhook_host=os.getenv("WEBHOOK_HOST", "").strip() or Settings.webhook_host,
+        webhook_port=_env_int("WEBHOOK_PORT", Settings.webhook_port),
+        workers=workers,
+        rate_limit=_env_flag("RATE_LIMIT", Settings.rate_limit),
+        quiz_compact=_env_flag("QUIZ_COMPACT", Settings.quiz_compact),
+        metrics_host=os.getenv("METRICS_HOST", "").strip() or Settings.metrics_host,
+        metrics_port=_env_int("METRICS_PORT", Settings.metrics_port),
+    )
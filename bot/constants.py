@@ -32,6 +32,9 @@ POINTS_BY_LEVEL = {
 }
 POINTS_DEFAULT = 10
 
+SESSION_EXPIRED_TEXT = "Бұл викторинаның уақыты өтіп кеткен. Жаңасын бастаңыз."
+STALE_BUTTON_TEXT = "Бұл батырма ескірген. Мәзірді қайта ашыңыз."
+
 WELCOME_TEXT = (
     "Сәлем! 👋\n"
     "Мен киелі сандар туралы қысқа әрі қызықты викторина жүргіземін.\n"
@@ -0,0 +1,118 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from aiogram import BaseMiddleware, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+from bot.constants import STALE_BUTTON_TEXT
+from bot.keyboards.callback_data import Op, Packet, StaleCallback, unpack
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackDecoder(BaseMiddleware):
+    """Unpacks callback data once, before any handler runs.
+
+    The decoded packet is passed on as `packet`. Buttons packed by another
+    version of the bot are answered with a hint to reopen the menu and
+    malformed data is logged; neither reaches a handler.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: dict[str, Any],
+    ) -> Any:
+        try:
+            data["packet"] = unpack(event.data or "")
+        except StaleCallback:
+            await event.answer(STALE_BUTTON_TEXT, show_alert=True)
+            return None
+        except ValueError as exc:
+            logger.warning("Malformed callback data %r: %s", event.data, exc)
+            await event.answer()
+            return None
+        return await handler(event, data)
+
+
+@dataclass(frozen=True)
+class CallbackRoute:
+    op: Op
+    handler: CallableObject
+    state: Optional[State] = None
+    otherwise: Optional[CallableObject] = None
+
+
+class CallbackTable:
+    """Callback query dispatch through one dict lookup by opcode.
+
+    Handlers receive the decoded fields as `payload`. A route bound to an
+    FSM state goes to its `otherwise` handler when the user is in another
+    state.
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[Op, CallbackRoute] = {}
+
+    def add(
+        self,
+        op: Op,
+        handler: Callable,
+        *,
+        state: Optional[State] = None,
+        otherwise: Optional[Callable] = None,
+    ) -> None:
+        if op in self._routes:
+            raise RuntimeError(f"Callback route {op.name} is already registered")
+        self._routes[op] = CallbackRoute(
+            op=op,
+            handler=CallableObject(handler),
+            state=state,
+            otherwise=CallableObject(otherwise) if otherwise is not None else None,
+        )
+
+    def route(
+        self,
+        op: Op,
+        *,
+        state: Optional[State] = None,
+        otherwise: Optional[Callable] = None,
+    ) -> Callable[[Callable], Callable]:
+        def decorator(handler: Callable) -> Callable:
+            self.add(op, handler, state=state, otherwise=otherwise)
+            return handler
+
+        return decorator
+
+    def __iter__(self) -> Iterator[CallbackRoute]:
+        return iter(self._routes.values())
+
+    async def dispatch(
+        self,
+        callback: CallbackQuery,
+        packet: Packet,
+        raw_state: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Any:
+        route = self._routes.get(packet.op)
+        if route is None:
+            return UNHANDLED
+
+        handler = route.handler
+        if route.state is not None and raw_state != route.state.state:
+            handler = route.otherwise
+            if handler is None:
+                return UNHANDLED
+        return await handler.call(callback, payload=packet.payload, raw_state=raw_state, **kwargs)
+
+    def register(self, router: Router) -> None:
+        router.callback_query.outer_middleware(CallbackDecoder())
+        router.callback_query.register(self.dispatch)
+
+
+callbacks = CallbackTable()
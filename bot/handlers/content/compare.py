@@ -1,59 +1,25 @@
-import random
+from collections import OrderedDict
 from typing import Optional
 
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, User
 from aiogram.fsm.context import FSMContext
 
-from bot.constants import MENU_COMPARE, MENU_BACK, MODE_TO_LEVEL
-from bot.keyboards.system.menu import main_menu_keyboard, back_menu_keyboard
+from bot.constants import MENU_COMPARE
+from bot.handlers.callbacks import callbacks
+from bot.handlers.quiz.engine import QuizEngine
+from bot.keyboards.callback_data import COMPARE_QUIZ_OPS, NumberRef, NumberView, Op
+from bot.keyboards.system.menu import main_menu_keyboard
 from bot.keyboards.content.compare import compare_numbers_keyboard, compare_info_keyboard
 from bot.keyboards.quiz.compare import compare_mode_keyboard, compare_question_keyboard
 from bot.states.quiz import CompareQuizStates
-from bot.utils.loader import load_compare_text, load_compare_questions
+from bot.utils.compare_index import COMPARE_NUMBERS, CompareIndex, CompareSection, CultureBlock
+from bot.utils.loader import load_compare_index, load_compare_question_bank
 
 router = Router()
 
-COMPARE_NUMBERS = ["3", "5", "7", "9", "40"]
-CULTURE_CODE_TO_PLAIN = {
-    "kazakh": "Қазақ / Түркі",
-    "islam": "Ислам",
-    "christ": "Христиан",
-    "persian": "Парсы",
-    "hindu": "Үнді",
-    "china": "Қытай",
-    "mongol": "Моңғол",
-    "summary": "Қысқаша салыстыру",
-}
-CULTURE_KEYS = list(CULTURE_CODE_TO_PLAIN.values())
-
-
-def _extract_section(text: str, number: str) -> str:
-    if not text:
-        return ""
-    lines = text.splitlines()
-    start_idx: Optional[int] = None
-    for i, line in enumerate(lines):
-        if line.strip().startswith(f"{number} саны"):
-            start_idx = i
-            break
-    if start_idx is None:
-        return ""
-
-    end_idx = len(lines)
-    for j in range(start_idx + 1, len(lines)):
-        for other in COMPARE_NUMBERS:
-            if lines[j].strip().startswith(f"{other} саны"):
-                end_idx = j
-                break
-        if end_idx != len(lines):
-            break
-
-    section = "\n".join(lines[start_idx:end_idx]).strip()
-    for stop_marker in ("<hr>", "Қорытынды:"):
-        if stop_marker in section:
-            section = section.split(stop_marker, 1)[0].strip()
-    return section
+# 5 numbers x (8 cultures + local/full/compare) fit with room to spare.
+RENDER_CACHE_SIZE = 64
 
 
 def _split_text(text: str, limit: int = 4000) -> list[str]:
@@ -89,112 +55,40 @@ def _format_section(section: str) -> str:
     return "\n".join(lines)
 
 
-def _match_culture(label: str) -> Optional[str]:
-    for key in CULTURE_KEYS:
-        if label.startswith(key):
-            return key
-    return None
-
-
-def _parse_cultures(section: str) -> tuple[str, list[dict]]:
-    lines = [line.rstrip() for line in section.splitlines()]
-    if not lines:
-        return "", []
-    header = lines[0].strip()
-    blocks: list[dict] = []
-    current: Optional[dict] = None
-
-    for line in lines[1:]:
-        stripped = line.strip()
-        if not stripped:
-            if current and current["text"]:
-                current["text"].append("")
-            continue
-
-        if ":" in stripped:
-            label, rest = stripped.split(":", 1)
-            key = _match_culture(label.strip())
-            if key:
-                if current:
-                    current["text"] = "\n".join(current["text"]).strip()
-                    blocks.append(current)
-                current = {
-                    "key": key,
-                    "label": label.strip(),
-                    "text": [rest.strip()],
-                }
-                continue
-
-        if current:
-            current["text"].append(stripped)
-
-    if current:
-        current["text"] = "\n".join(current["text"]).strip()
-        blocks.append(current)
+def _render_compare(section: CompareSection, view: str) -> str:
+    if not section.blocks:
+        return _format_section(section.raw)
 
-    return header, blocks
-
-
-def _shorten_text(text: str, max_chars: int = 320) -> str:
-    if len(text) <= max_chars:
-        return text
-    cut = text[:max_chars]
-    for sep in [". ", "! ", "? ", "… "]:
-        idx = cut.rfind(sep)
-        if idx > 50:
-            cut = cut[: idx + len(sep.strip())]
-            break
-    return cut.rstrip() + "..."
-
-
-def _render_compare(section: str, view: str) -> str:
-    if not section:
-        return ""
-    header, blocks = _parse_cultures(section)
-    if not blocks:
-        return _format_section(section)
-
-    def find_block(key: str) -> Optional[dict]:
-        for block in blocks:
-            if block["key"] == key:
-                return block
-        return None
-
-    def add_block(lines: list[str], block: dict, short: bool = False) -> None:
-        text = block.get("text", "")
-        if short:
-            text = _shorten_text(text)
-        lines.append(f"<b>{block.get('label', block.get('key', ''))}</b>")
+    def add_block(lines: list[str], block: CultureBlock, short: bool = False) -> None:
+        text = block.short_text if short else block.text
+        lines.append(f"<b>{block.label}</b>")
         if text:
             lines.append(text)
 
     lines: list[str] = []
-    if header:
-        lines.append(f"<b>{header}</b>")
+    if section.header:
+        lines.append(f"<b>{section.header}</b>")
 
-    kazakh = find_block("Қазақ / Түркі")
-    summary = find_block("Қысқаша салыстыру")
-    others = [b for b in blocks if b.get("key") not in {"Қазақ / Түркі", "Қысқаша салыстыру"}]
+    kazakh = section.block("kazakh")
+    summary = section.block("summary")
+    others = [b for b in section.blocks if b.code not in {"kazakh", "summary"}]
 
     if view.startswith("culture:"):
         code = view.split(":", 1)[1]
-        label = CULTURE_CODE_TO_PLAIN.get(code)
-        if label:
-            block = find_block(label)
-            if block:
-                add_block(lines, block, short=False)
-                return "\n\n".join(lines)
-        return "\n\n".join(lines) if lines else ""
+        block = section.block(code)
+        if block:
+            add_block(lines, block, short=False)
+        return "\n\n".join(lines)
 
     if view == "local":
         if kazakh:
             add_block(lines, kazakh, short=False)
-        elif blocks:
-            add_block(lines, blocks[0], short=False)
+        elif section.blocks:
+            add_block(lines, section.blocks[0], short=False)
         return "\n\n".join(lines)
 
     if view == "full":
-        for block in blocks:
+        for block in section.blocks:
             add_block(lines, block, short=False)
         return "\n\n".join(lines)
 
@@ -210,18 +104,49 @@ def _render_compare(section: str, view: str) -> str:
     return "\n\n".join(lines)
 
 
+class _RenderCache:
+    """Bounded LRU of split message parts keyed by (number, view).
+
+    Entries belong to one compare index snapshot and are dropped as soon as
+    a reloaded index is seen.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._index: Optional[CompareIndex] = None
+        self._parts: OrderedDict[tuple[str, str], tuple[str, ...]] = OrderedDict()
+
+    def get(self, index: CompareIndex, number: str, view: str) -> tuple[str, ...]:
+        if index is not self._index:
+            self._parts.clear()
+            self._index = index
+
+        key = (number, view)
+        parts = self._parts.get(key)
+        if parts is not None:
+            self._parts.move_to_end(key)
+            return parts
+
+        section = index.section(number)
+        parts = tuple(_split_text(_render_compare(section, view))) if section else ()
+        self._parts[key] = parts
+        if len(self._parts) > self._maxsize:
+            self._parts.popitem(last=False)
+        return parts
+
+
+_render_cache = _RenderCache(RENDER_CACHE_SIZE)
+
+
 async def _send_compare(message: Message, number: str, view: str, *, edit: bool = False) -> None:
-    text = load_compare_text()
-    section = _extract_section(text, number)
-    if not section:
+    parts = _render_cache.get(load_compare_index(), number, view)
+    if not parts:
         await message.answer(
             "Бұл сан бойынша мәлімет табылмады.",
             reply_markup=main_menu_keyboard(),
         )
         return
 
-    formatted = _render_compare(section, view)
-    parts = _split_text(formatted)
     if edit and len(parts) == 1:
         try:
             await message.edit_text(
@@ -251,7 +176,7 @@ async def compare_menu(message: Message) -> None:
     )
 
 
-@router.callback_query(F.data == "cmp:list")
+@callbacks.route(Op.CMP_LIST)
 async def compare_list(callback: CallbackQuery) -> None:
     try:
         await callback.message.edit_reply_markup(reply_markup=None)
@@ -264,28 +189,25 @@ async def compare_list(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("cmp:num:"))
-async def compare_show_number(callback: CallbackQuery) -> None:
-    number = callback.data.split(":", 2)[2]
-    await _send_compare(callback.message, number, "culture:kazakh", edit=True)
+@callbacks.route(Op.CMP_NUMBER)
+async def compare_show_number(callback: CallbackQuery, payload: NumberRef) -> None:
+    await _send_compare(callback.message, payload.number, "culture:kazakh", edit=True)
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("cmp:view:"))
-async def compare_view(callback: CallbackQuery) -> None:
-    _, _, number, view = callback.data.split(":", 3)
-    await _send_compare(callback.message, number, view, edit=True)
+@callbacks.route(Op.CMP_VIEW)
+async def compare_view(callback: CallbackQuery, payload: NumberView) -> None:
+    await _send_compare(callback.message, payload.number, payload.view, edit=True)
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("cmp:cul:"))
-async def compare_culture(callback: CallbackQuery) -> None:
-    _, _, number, code = callback.data.split(":", 3)
-    await _send_compare(callback.message, number, f"culture:{code}", edit=True)
+@callbacks.route(Op.CMP_CULTURE)
+async def compare_culture(callback: CallbackQuery, payload: NumberView) -> None:
+    await _send_compare(callback.message, payload.number, f"culture:{payload.view}", edit=True)
     await callback.answer()
 
 
-@router.callback_query(F.data == "cmp:quiz")
+@callbacks.route(Op.CMP_QUIZ)
 async def compare_quiz_menu(callback: CallbackQuery, state: FSMContext) -> None:
     await state.clear()
     try:
@@ -299,197 +221,20 @@ async def compare_quiz_menu(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
 
 
-def _is_multi(question: dict) -> bool:
-    return question.get("multi", False) or len(question.get("correct", [])) > 1
-
-
-def _format_question_text(question: dict, index: int, total: int) -> str:
-    title = question.get("title", "")
-    level = question.get("level", "")
-    question_text = question.get("question", "")
-    options = question.get("options", {})
-
-    lines = []
-    if title:
-        lines.append(f"<b>{title}</b>")
-    lines.append(f"Сұрақ {index + 1}/{total} • Деңгей: {level}")
-    lines.append("")
-    lines.append(question_text)
-    lines.append("")
-    for key in sorted(options.keys()):
-        lines.append(f"{key}) {options[key]}")
-    if _is_multi(question):
-        lines.append("")
-        lines.append("Бірнеше дұрыс жауап болуы мүмкін.")
-    return "\n".join(lines)
-
-
-def _select_questions(mode: str) -> list[dict]:
-    questions = load_compare_questions()
-    if mode == "mixed":
-        random.shuffle(questions)
-        return questions
-    level = MODE_TO_LEVEL.get(mode)
-    filtered = [q for q in questions if q.get("level") == level]
-    random.shuffle(filtered)
-    return filtered
-
-
-def _build_explanation(question: dict, is_correct: bool) -> str:
-    prefix = "✅ Дұрыс!" if is_correct else "❌ Қате."
-    correct = ", ".join(question.get("correct", []))
-    explanation = question.get("explanation", "")
-    return f"{prefix}\nДұрыс жауап: {correct}\n{explanation}"
-
-
-async def _send_question(message: Message, state: FSMContext) -> None:
-    data = await state.get_data()
-    questions = data.get("questions", [])
-    index = data.get("current_index", 0)
-
-    if index >= len(questions):
-        return
-
-    question = questions[index]
-    selected = set(data.get("selected", []))
-    text = _format_question_text(question, index, len(questions))
-    await message.answer(
-        text,
-        reply_markup=compare_question_keyboard(question, index, selected),
-    )
-
-
-async def _finish_quiz(message: Message, state: FSMContext) -> None:
-    data = await state.get_data()
+async def _finish_quiz(user: User, data: dict) -> str:
     correct = data.get("correct_count", 0)
-    total = len(data.get("questions", []))
-    await state.clear()
-    await message.answer(
-        f"Салыстырмалы викторина аяқталды!\nНәтиже: {correct}/{total} дұрыс жауап.",
-        reply_markup=main_menu_keyboard(),
-    )
-
-
-@router.callback_query(F.data.startswith("cmpmode:"))
-async def compare_quiz_start(callback: CallbackQuery, state: FSMContext) -> None:
-    mode = callback.data.split(":", 1)[1]
-    questions = _select_questions(mode)
-    if not questions:
-        await callback.message.answer(
-            "Бұл деңгейде сұрақтар табылмады. Басқа деңгейді таңдаңыз.",
-            reply_markup=compare_mode_keyboard(),
-        )
-        await callback.answer()
-        return
-
-    await state.set_state(CompareQuizStates.in_quiz)
-    await state.update_data(
-        mode=mode,
-        questions=questions,
-        current_index=0,
-        correct_count=0,
-        selected=[],
-    )
-
-    await callback.message.answer(
-        f"Салыстырмалы викторина басталды! Сұрақ саны: {len(questions)}.",
-        reply_markup=back_menu_keyboard(),
-    )
-    await _send_question(callback.message, state)
-    await callback.answer()
-
-
-@router.callback_query(CompareQuizStates.in_quiz, F.data.startswith("cmp:ans:"))
-async def compare_quiz_answer(callback: CallbackQuery, state: FSMContext) -> None:
-    _, _, index_str, choice = callback.data.split(":")
-    data = await state.get_data()
-    current_index = data.get("current_index", 0)
-
-    if int(index_str) != current_index:
-        await callback.answer("Бұл сұрақтың жауабы қабылданды.", show_alert=False)
-        return
-
-    questions = data.get("questions", [])
-    question = questions[current_index]
-    correct_set = set(question.get("correct", []))
-    is_correct = {choice} == correct_set
-    if is_correct:
-        await state.update_data(correct_count=data.get("correct_count", 0) + 1)
-
-    await callback.message.answer(_build_explanation(question, is_correct))
-
-    next_index = current_index + 1
-    if next_index >= len(questions):
-        await _finish_quiz(callback.message, state)
-    else:
-        await state.update_data(current_index=next_index, selected=[])
-        await _send_question(callback.message, state)
-    await callback.answer()
-
-
-@router.callback_query(CompareQuizStates.in_quiz, F.data.startswith("cmp:toggle:"))
-async def compare_quiz_toggle(callback: CallbackQuery, state: FSMContext) -> None:
-    _, _, index_str, choice = callback.data.split(":")
-    data = await state.get_data()
-    current_index = data.get("current_index", 0)
-
-    if int(index_str) != current_index:
-        await callback.answer("Бұл сұрақ өзекті емес.", show_alert=False)
-        return
-
-    selected = set(data.get("selected", []))
-    if choice in selected:
-        selected.remove(choice)
-    else:
-        selected.add(choice)
-
-    await state.update_data(selected=list(selected))
-
-    question = data.get("questions", [])[current_index]
-    await callback.message.edit_reply_markup(
-        reply_markup=compare_question_keyboard(question, current_index, selected)
-    )
-    await callback.answer()
-
-
-@router.callback_query(CompareQuizStates.in_quiz, F.data.startswith("cmp:submit:"))
-async def compare_quiz_submit(callback: CallbackQuery, state: FSMContext) -> None:
-    _, _, index_str = callback.data.split(":")
-    data = await state.get_data()
-    current_index = data.get("current_index", 0)
-
-    if int(index_str) != current_index:
-        await callback.answer("Бұл сұрақ өзекті емес.", show_alert=False)
-        return
-
-    selected = set(data.get("selected", []))
-    if not selected:
-        await callback.answer("Кемінде бір нұсқа таңдаңыз.", show_alert=True)
-        return
-
-    question = data.get("questions", [])[current_index]
-    correct_set = set(question.get("correct", []))
-    is_correct = selected == correct_set
-    if is_correct:
-        await state.update_data(correct_count=data.get("correct_count", 0) + 1)
-
-    await callback.message.answer(_build_explanation(question, is_correct))
-
-    next_index = current_index + 1
-    if next_index >= len(data.get("questions", [])):
-        await _finish_quiz(callback.message, state)
-    else:
-        await state.update_data(current_index=next_index, selected=[])
-        await _send_question(callback.message, state)
-    await callback.answer()
-
-
-@router.message(CompareQuizStates.in_quiz, F.text == MENU_BACK)
-async def compare_quiz_back_text(message: Message, state: FSMContext) -> None:
-    await state.clear()
-    await message.answer("Мәзірге оралдық.", reply_markup=main_menu_keyboard())
-
-
-@router.message(CompareQuizStates.in_quiz, F.text != MENU_BACK)
-async def compare_quiz_text_fallback(message: Message) -> None:
-    await message.answer("Жауапты төмендегі батырмалар арқылы таңдаңыз.")
+    total = len(data.get("question_ids", []))
+    return f"Салыстырмалы викторина аяқталды!\nНәтиже: {correct}/{total} дұрыс жауап."
+
+
+compare_quiz_engine = QuizEngine(
+    name="cmp_quiz",
+    title="Салыстырмалы викторина",
+    load_bank=load_compare_question_bank,
+    in_quiz=CompareQuizStates.in_quiz,
+    ops=COMPARE_QUIZ_OPS,
+    build_keyboard=compare_question_keyboard,
+    mode_keyboard=compare_mode_keyboard,
+    on_finish=_finish_quiz,
+)
+compare_quiz_engine.register(router)
@@ -3,20 +3,34 @@ from pathlib import Path
 from typing import Optional
 
 from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message, CallbackQuery, FSInputFile
 
 from bot.constants import MENU_INFO
+from bot.handlers.callbacks import callbacks
+from bot.keyboards.callback_data import NumberRef, NumberView, Op
 from bot.keyboards.system.menu import main_menu_keyboard
 from bot.keyboards.content.numbers import (
     numbers_keyboard,
     number_info_keyboard,
 )
-from bot.utils.loader import load_sacred_numbers
+from bot.utils.loader import (
+    NUMBER_ASSETS_DIR,
+    load_asset_manifest,
+    load_sacred_numbers,
+    load_file_ids,
+    update_file_ids,
+)
+from bot.utils.persistence import run_io
 
 router = Router()
-BASE_DIR = Path(__file__).resolve().parents[3]
 IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp")
 CAPTION_LIMIT = 1024
+# Parts of the errors Telegram returns for a file_id it no longer accepts.
+STALE_FILE_ID_ERRORS = ("file identifier", "file_id", "file reference", "file_reference")
+
+# Telegram file_id per image file name, filled after the first upload.
+_file_ids: Optional[dict[str, str]] = None
 
 
 @router.message(F.text == MENU_INFO)
@@ -69,13 +83,56 @@ def _render_card(number: str, item: dict, mode: str) -> str:
 
 
 def _find_image_path(number: str) -> Optional[Path]:
+    entry = load_asset_manifest().get(number)
+    if entry:
+        return NUMBER_ASSETS_DIR / entry["path"]
+
+    # No manifest yet, or the number was added after the last run of
+    # scripts/build_assets.py: use the source image.
     for ext in IMAGE_EXTS:
-        candidate = BASE_DIR / "assets" / "numbers" / f"num_{number}{ext}"
+        candidate = NUMBER_ASSETS_DIR / f"num_{number}{ext}"
         if candidate.exists():
             return candidate
     return None
 
 
+async def _get_file_ids() -> dict[str, str]:
+    global _file_ids
+    if _file_ids is None:
+        _file_ids = await run_io(load_file_ids)
+    return _file_ids
+
+
+async def _store_file_id(key: str, file_id: Optional[str]) -> None:
+    global _file_ids
+    _file_ids = await run_io(update_file_ids, {key: file_id})
+
+
+def _is_stale_file_id(error: TelegramBadRequest) -> bool:
+    text = error.message.lower()
+    return any(marker in text for marker in STALE_FILE_ID_ERRORS)
+
+
+async def _answer_photo(message: Message, image_path: Path, **kwargs) -> Message:
+    file_ids = await _get_file_ids()
+    key = image_path.name
+    file_id = file_ids.get(key)
+    if file_id:
+        try:
+            return await message.answer_photo(file_id, **kwargs)
+        except TelegramBadRequest as error:
+            # Anything else (caption, markup, chat) would fail the upload too.
+            if not _is_stale_file_id(error):
+                raise
+            # The cached id is no longer accepted; upload the file again.
+            await _store_file_id(key, None)
+
+    sent = await message.answer_photo(FSInputFile(image_path), **kwargs)
+    if sent.photo:
+        await _store_file_id(key, sent.photo[-1].file_id)
+    return sent
+
+
 async def _send_card(message: Message, number: str, item: dict, mode: str) -> None:
     text = _render_card(number, item, mode)
     image_path = _find_image_path(number)
@@ -85,8 +142,9 @@ async def _send_card(message: Message, number: str, item: dict, mode: str) -> No
             caption = _render_card(number, item, "short")
             if mode == "full":
                 caption = f"{caption}\n\n(Толық нұсқа төменде.)"
-        await message.answer_photo(
-            FSInputFile(image_path),
+        await _answer_photo(
+            message,
+            image_path,
             caption=caption,
             reply_markup=number_info_keyboard(number, mode),
         )
@@ -117,7 +175,7 @@ async def _edit_card(message: Message, number: str, item: dict, mode: str) -> No
         )
 
 
-@router.callback_query(F.data == "num:random")
+@callbacks.route(Op.NUM_RANDOM)
 async def number_random(callback: CallbackQuery) -> None:
     data = load_sacred_numbers()
     if not data:
@@ -133,7 +191,7 @@ async def number_random(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "num:list")
+@callbacks.route(Op.NUM_LIST)
 async def number_list(callback: CallbackQuery) -> None:
     data = load_sacred_numbers()
     if not data:
@@ -156,7 +214,7 @@ async def number_list(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "num:next")
+@callbacks.route(Op.NUM_NEXT)
 async def number_next(callback: CallbackQuery) -> None:
     data = load_sacred_numbers()
     if not data:
@@ -172,9 +230,9 @@ async def number_next(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("num:toggle:"))
-async def number_toggle(callback: CallbackQuery) -> None:
-    _, _, number, mode = callback.data.split(":", 3)
+@callbacks.route(Op.NUM_TOGGLE)
+async def number_toggle(callback: CallbackQuery, payload: NumberView) -> None:
+    number, mode = payload.number, payload.view
     data = load_sacred_numbers()
     item = data.get(number)
     if not item:
@@ -193,9 +251,9 @@ async def number_toggle(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("num:help:"))
-async def number_help(callback: CallbackQuery) -> None:
-    _, _, number = callback.data.split(":", 2)
+@callbacks.route(Op.NUM_HELP)
+async def number_help(callback: CallbackQuery, payload: NumberRef) -> None:
+    number = payload.number
     data = load_sacred_numbers()
     item = data.get(number)
     if not item:
@@ -217,13 +275,9 @@ async def number_help(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("num:"))
-async def number_show(callback: CallbackQuery) -> None:
-    number = callback.data.split(":", 1)[1]
-    if number in {"random", "next", "list"} or not number.isdigit():
-        await callback.answer()
-        return
-
+@callbacks.route(Op.NUM_SHOW)
+async def number_show(callback: CallbackQuery, payload: NumberRef) -> None:
+    number = payload.number
     data = load_sacred_numbers()
     item = data.get(number)
     if not item:
@@ -0,0 +1,266 @@
+import random
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, User
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+
+from bot.config import Settings
+from bot.constants import (
+    MENU_BACK,
+    SESSION_EXPIRED_TEXT,
+    MODE_TO_LEVEL,
+    POINTS_BY_LEVEL,
+    POINTS_DEFAULT,
+)
+from bot.handlers.callbacks import callbacks
+from bot.keyboards.callback_data import QuestionChoice, QuestionRef, QuizMode, QuizOps
+from bot.keyboards.system.menu import main_menu_keyboard, back_menu_keyboard
+from bot.utils.question_bank import QuestionBank
+from bot.utils.question_render import KeyboardBuilder, QuestionRenderCache, RenderedQuestion
+
+# Records the finished quiz (if needed) and returns the summary text.
+FinishHandler = Callable[[User, dict], Awaitable[str]]
+
+
+def _build_explanation(question: dict, is_correct: bool) -> str:
+    prefix = "✅ Дұрыс!" if is_correct else "❌ Қате."
+    correct = ", ".join(question.get("correct", []))
+    explanation = question.get("explanation", "")
+    return f"{prefix}\nДұрыс жауап: {correct}\n{explanation}"
+
+
+def _points_for_question(question: dict) -> int:
+    level = question.get("level", "")
+    return POINTS_BY_LEVEL.get(level, POINTS_DEFAULT)
+
+
+class QuizEngine:
+    """Question flow shared by the main and the comparison quiz.
+
+    A quiz is described by its name (which labels its handlers in metrics),
+    question bank, FSM state, callback opcodes, keyboards and texts.
+    `register()` adds the start, answer, toggle and submit routes to the
+    callback table and the text fallbacks to a router. Each answer or toggle
+    reads the FSM data once, changes it locally and stores it with a single
+    `set_data`.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        title: str,
+        load_bank: Callable[[], QuestionBank],
+        in_quiz: State,
+        ops: QuizOps,
+        build_keyboard: KeyboardBuilder,
+        mode_keyboard: Callable[[], InlineKeyboardMarkup],
+        on_finish: FinishHandler,
+    ) -> None:
+        self.name = name
+        self._title = title
+        self._load_bank = load_bank
+        self._in_quiz = in_quiz
+        self._ops = ops
+        self._mode_keyboard = mode_keyboard
+        self._on_finish = on_finish
+        self._rendered = QuestionRenderCache(build_keyboard)
+
+    def select_questions(self, mode: str) -> list[str]:
+        level = None if mode == "mixed" else MODE_TO_LEVEL.get(mode)
+        question_ids = self._load_bank().ids(level)
+        random.shuffle(question_ids)
+        return question_ids
+
+    def _question_at(self, data: dict, index: int) -> Optional[RenderedQuestion]:
+        question_ids = data.get("question_ids", [])
+        if index >= len(question_ids):
+            return None
+        return self._rendered.get(self._load_bank(), question_ids[index])
+
+    @staticmethod
+    def _current_question_id(data: dict) -> Optional[str]:
+        question_ids = data.get("question_ids", [])
+        index = data.get("current_index", 0)
+        return question_ids[index] if index < len(question_ids) else None
+
+    async def _send_question(self, message: Message, data: dict, verdict: Optional[str] = None) -> None:
+        index = data.get("current_index", 0)
+        rendered = self._question_at(data, index)
+        if rendered is None:
+            return
+
+        text = rendered.text(index, len(data.get("question_ids", [])))
+        markup = rendered.keyboard(set(data.get("selected", [])))
+        if verdict is not None and data.get("compact"):
+            # One edit shows the verdict and the next question in place.
+            text = f"{verdict}\n\n{text}"
+            try:
+                await message.edit_text(text, reply_markup=markup)
+                return
+            except TelegramBadRequest:
+                pass
+        elif verdict is not None:
+            await message.answer(verdict)
+        await message.answer(text, reply_markup=markup)
+
+    @staticmethod
+    async def _show_verdict(message: Message, data: dict, verdict: str) -> None:
+        if data.get("compact"):
+            try:
+                await message.edit_text(verdict)
+                return
+            except TelegramBadRequest:
+                pass
+        await message.answer(verdict)
+
+    @staticmethod
+    async def _abort_missing_question(callback: CallbackQuery, state: FSMContext) -> None:
+        # The bank was reloaded and no longer has this question.
+        await state.clear()
+        await callback.message.answer(
+            "Сұрақтар жаңартылды. Викторинаны қайта бастаңыз.",
+            reply_markup=main_menu_keyboard(),
+        )
+        await callback.answer()
+
+    async def _record_answer(
+        self,
+        callback: CallbackQuery,
+        state: FSMContext,
+        data: dict,
+        question: dict,
+        is_correct: bool,
+    ) -> None:
+        if is_correct:
+            data["correct_count"] = data.get("correct_count", 0) + 1
+            data["points"] = data.get("points", 0) + _points_for_question(question)
+
+        verdict = _build_explanation(question, is_correct)
+        next_index = data.get("current_index", 0) + 1
+        if next_index >= len(data.get("question_ids", [])):
+            # Cleared before the stats I/O, so a second tap on the last
+            # answer finds no quiz and cannot finish it again.
+            await state.clear()
+            summary = await self._on_finish(callback.from_user, data)
+            await self._show_verdict(callback.message, data, verdict)
+            await callback.message.answer(summary, reply_markup=main_menu_keyboard())
+        else:
+            data["current_index"] = next_index
+            data["selected"] = []
+            await state.set_data(data)
+            await self._send_question(callback.message, data, verdict)
+        await callback.answer()
+
+    async def start(self, callback: CallbackQuery, state: FSMContext, settings: Settings, payload: QuizMode) -> None:
+        mode = payload.mode
+        question_ids = self.select_questions(mode)
+        if not question_ids:
+            await callback.message.answer(
+                "Бұл деңгейде сұрақтар табылмады. Басқа деңгейді таңдаңыз.",
+                reply_markup=self._mode_keyboard(),
+            )
+            await callback.answer()
+            return
+
+        data = {
+            "mode": mode,
+            "question_ids": question_ids,
+            "current_index": 0,
+            "correct_count": 0,
+            "points": 0,
+            "selected": [],
+            "compact": settings.quiz_compact,
+        }
+        await state.set_state(self._in_quiz)
+        await state.set_data(data)
+
+        try:
+            await callback.message.edit_reply_markup(reply_markup=None)
+        except Exception:
+            pass
+
+        await callback.message.answer(
+            f"{self._title} басталды! Сұрақ саны: {len(question_ids)}.",
+            reply_markup=back_menu_keyboard(),
+        )
+        await self._send_question(callback.message, data)
+        await callback.answer()
+
+    async def answer(self, callback: CallbackQuery, state: FSMContext, payload: QuestionChoice) -> None:
+        data = await state.get_data()
+
+        if payload.question_id != self._current_question_id(data):
+            await callback.answer("Бұл сұрақтың жауабы қабылданды.", show_alert=False)
+            return
+
+        rendered = self._question_at(data, data.get("current_index", 0))
+        if rendered is None:
+            await self._abort_missing_question(callback, state)
+            return
+
+        question = rendered.question
+        is_correct = {payload.option} == set(question.get("correct", []))
+        await self._record_answer(callback, state, data, question, is_correct)
+
+    async def toggle(self, callback: CallbackQuery, state: FSMContext, payload: QuestionChoice) -> None:
+        data = await state.get_data()
+
+        if payload.question_id != self._current_question_id(data):
+            await callback.answer("Бұл сұрақ өзекті емес.", show_alert=False)
+            return
+
+        rendered = self._question_at(data, data.get("current_index", 0))
+        if rendered is None:
+            await self._abort_missing_question(callback, state)
+            return
+
+        selected = set(data.get("selected", [])) ^ {payload.option}
+        data["selected"] = sorted(selected)
+        await state.set_data(data)
+        await callback.message.edit_reply_markup(reply_markup=rendered.keyboard(selected))
+        await callback.answer()
+
+    async def submit(self, callback: CallbackQuery, state: FSMContext, payload: QuestionRef) -> None:
+        data = await state.get_data()
+
+        if payload.question_id != self._current_question_id(data):
+            await callback.answer("Бұл сұрақ өзекті емес.", show_alert=False)
+            return
+
+        selected = set(data.get("selected", []))
+        if not selected:
+            await callback.answer("Кемінде бір нұсқа таңдаңыз.", show_alert=True)
+            return
+
+        rendered = self._question_at(data, data.get("current_index", 0))
+        if rendered is None:
+            await self._abort_missing_question(callback, state)
+            return
+
+        question = rendered.question
+        is_correct = selected == set(question.get("correct", []))
+        await self._record_answer(callback, state, data, question, is_correct)
+
+    @staticmethod
+    async def expired(callback: CallbackQuery) -> None:
+        await callback.answer(SESSION_EXPIRED_TEXT, show_alert=True)
+
+    async def back_text(self, message: Message, state: FSMContext) -> None:
+        await state.clear()
+        await message.answer("Мәзірге оралдық.", reply_markup=main_menu_keyboard())
+
+    async def text_fallback(self, message: Message) -> None:
+        await message.answer("Жауапты төмендегі батырмалар арқылы таңдаңыз.")
+
+    def register(self, router: Router) -> None:
+        callbacks.add(self._ops.mode, self.start)
+        # Buttons of a quiz that has already finished or expired go to `expired`.
+        callbacks.add(self._ops.answer, self.answer, state=self._in_quiz, otherwise=self.expired)
+        callbacks.add(self._ops.toggle, self.toggle, state=self._in_quiz, otherwise=self.expired)
+        callbacks.add(self._ops.submit, self.submit, state=self._in_quiz, otherwise=self.expired)
+        router.message.register(self.back_text, self._in_quiz, F.text == MENU_BACK)
+        router.message.register(self.text_fallback, self._in_quiz, F.text != MENU_BACK)
@@ -7,7 +7,8 @@ from aiogram.fsm.context import FSMContext
 from bot.constants import MENU_FEEDBACK, MENU_BACK
 from bot.keyboards.system.menu import main_menu_keyboard, back_menu_keyboard
 from bot.states.quiz import FeedbackStates
-from bot.utils.loader import append_feedback
+from bot.utils.feedback_log import append_feedback
+from bot.utils.persistence import run_io
 
 router = Router()
 
@@ -34,7 +35,7 @@ async def feedback_receive(message: Message, state: FSMContext) -> None:
         "text": message.text or "",
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
     }
-    append_feedback(entry)
+    await run_io(append_feedback, entry)
 
     await state.clear()
     await message.answer(
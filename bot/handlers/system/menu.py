@@ -1,13 +1,29 @@
 from aiogram import Router, F
-from aiogram.types import CallbackQuery
+from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
+from bot.constants import MENU_BACK
+from bot.handlers.callbacks import callbacks
+from bot.keyboards.callback_data import Op
 from bot.keyboards.system.menu import main_menu_keyboard
 
 router = Router()
 
 
-@router.callback_query(F.data == "menu")
+@router.message(Command("menu"))
+async def cmd_menu(message: Message, state: FSMContext) -> None:
+    await state.clear()
+    await message.answer("Мәзірге оралдық.", reply_markup=main_menu_keyboard())
+
+
+@router.message(F.text == MENU_BACK)
+async def menu_back(message: Message, state: FSMContext) -> None:
+    await state.clear()
+    await message.answer("Мәзірге оралдық.", reply_markup=main_menu_keyboard())
+
+
+@callbacks.route(Op.MENU)
 async def inline_menu(callback: CallbackQuery, state: FSMContext) -> None:
     await state.clear()
     try:
@@ -4,7 +4,7 @@ from aiogram.types import Message
 
 from bot.constants import MENU_STATS
 from bot.keyboards.system.menu import main_menu_keyboard
-from bot.utils.loader import load_stats
+from bot.utils.stats_aggregator import get_stats_aggregator
 
 router = Router()
 
@@ -43,8 +43,7 @@ def _format_stats(user_stats: dict) -> str:
 @router.message(Command("stats"))
 @router.message(F.text == MENU_STATS)
 async def stats(message: Message) -> None:
-    stats_data = load_stats()
-    user_stats = stats_data.get(str(message.from_user.id))
+    user_stats = await get_stats_aggregator().get(str(message.from_user.id))
     if not user_stats:
         await message.answer(
             "Әзірге статистика жоқ. Алдымен викторинадан өтіп көріңіз!",
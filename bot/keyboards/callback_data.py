@@ -0,0 +1,214 @@
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, NamedTuple, Optional
+
+from bot.constants import MODE_LABELS
+from bot.utils.compare_index import CULTURE_CODE_TO_PLAIN
+
+# Bump whenever an opcode, a field or a choice list below changes meaning:
+# buttons packed by an older deployment are then rejected as stale instead
+# of being decoded into the wrong thing.
+CALLBACK_VERSION = 1
+# Telegram rejects callback data longer than this many bytes.
+CALLBACK_DATA_LIMIT = 64
+SEPARATOR = ":"
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+_VERSION_TAG = _DIGITS[CALLBACK_VERSION]
+
+
+class StaleCallback(ValueError):
+    """Callback data packed by another version of the bot."""
+
+
+class Op(IntEnum):
+    MENU = 1
+    NUM_SHOW = 2
+    NUM_RANDOM = 3
+    NUM_LIST = 4
+    NUM_NEXT = 5
+    NUM_TOGGLE = 6
+    NUM_HELP = 7
+    CMP_LIST = 8
+    CMP_NUMBER = 9
+    CMP_VIEW = 10
+    CMP_CULTURE = 11
+    CMP_QUIZ = 12
+    QUIZ_MODE = 13
+    QUIZ_ANSWER = 14
+    QUIZ_TOGGLE = 15
+    QUIZ_SUBMIT = 16
+    CMP_QUIZ_MODE = 17
+    CMP_QUIZ_ANSWER = 18
+    CMP_QUIZ_TOGGLE = 19
+    CMP_QUIZ_SUBMIT = 20
+
+
+class QuizOps(NamedTuple):
+    mode: Op
+    answer: Op
+    toggle: Op
+    submit: Op
+
+
+QUIZ_OPS = QuizOps(Op.QUIZ_MODE, Op.QUIZ_ANSWER, Op.QUIZ_TOGGLE, Op.QUIZ_SUBMIT)
+COMPARE_QUIZ_OPS = QuizOps(Op.CMP_QUIZ_MODE, Op.CMP_QUIZ_ANSWER, Op.CMP_QUIZ_TOGGLE, Op.CMP_QUIZ_SUBMIT)
+
+
+@dataclass(frozen=True)
+class NumberRef:
+    number: str
+
+
+@dataclass(frozen=True)
+class NumberView:
+    number: str
+    view: str
+
+
+@dataclass(frozen=True)
+class QuizMode:
+    mode: str
+
+
+@dataclass(frozen=True)
+class QuestionChoice:
+    question_id: str
+    option: str
+
+
+@dataclass(frozen=True)
+class QuestionRef:
+    question_id: str
+
+
+@dataclass(frozen=True)
+class Packet:
+    op: Op
+    payload: Any = None
+
+
+def to_base36(value: int) -> str:
+    if value < 0:
+        raise ValueError(f"{value} is negative")
+    digits = ""
+    while True:
+        value, digit = divmod(value, 36)
+        digits = _DIGITS[digit] + digits
+        if not value:
+            return digits
+
+
+def from_base36(text: str) -> int:
+    if not text or not all(char in _DIGITS for char in text):
+        raise ValueError(f"{text!r} is not a base-36 number")
+    return int(text, 36)
+
+
+class _Number:
+    """A sacred number such as "40", packed as base 36 ("14")."""
+
+    @staticmethod
+    def encode(value: str) -> str:
+        return to_base36(int(value))
+
+    @staticmethod
+    def decode(text: str) -> str:
+        return str(from_base36(text))
+
+
+class _Choice:
+    """One of a fixed list of words, packed as its base-36 index."""
+
+    def __init__(self, *choices: str) -> None:
+        self._choices = choices
+        self._index = {choice: to_base36(index) for index, choice in enumerate(choices)}
+
+    def encode(self, value: str) -> str:
+        try:
+            return self._index[value]
+        except KeyError:
+            raise ValueError(f"{value!r} is not one of {self._choices}") from None
+
+    def decode(self, text: str) -> str:
+        index = from_base36(text)
+        if index >= len(self._choices):
+            raise ValueError(f"choice {index} is out of range")
+        return self._choices[index]
+
+
+class _Text:
+    """A short identifier (question id, option key) kept as is."""
+
+    @staticmethod
+    def encode(value: str) -> str:
+        if not value or SEPARATOR in value:
+            raise ValueError(f"{value!r} cannot be packed")
+        return value
+
+    @staticmethod
+    def decode(text: str) -> str:
+        if not text:
+            raise ValueError("empty field")
+        return text
+
+
+_NUMBER = _Number()
+_TEXT = _Text()
+_CARD_MODE = _Choice("short", "full")
+_COMPARE_VIEW = _Choice("compare", "full", "local")
+_CULTURE = _Choice(*CULTURE_CODE_TO_PLAIN)
+_QUIZ_MODE = _Choice(*MODE_LABELS)
+
+# Payload type and field codecs of every opcode.
+_LAYOUTS: dict[Op, tuple[Optional[type], tuple]] = {
+    Op.MENU: (None, ()),
+    Op.NUM_SHOW: (NumberRef, (_NUMBER,)),
+    Op.NUM_RANDOM: (None, ()),
+    Op.NUM_LIST: (None, ()),
+    Op.NUM_NEXT: (None, ()),
+    Op.NUM_TOGGLE: (NumberView, (_NUMBER, _CARD_MODE)),
+    Op.NUM_HELP: (NumberRef, (_NUMBER,)),
+    Op.CMP_LIST: (None, ()),
+    Op.CMP_NUMBER: (NumberRef, (_NUMBER,)),
+    Op.CMP_VIEW: (NumberView, (_NUMBER, _COMPARE_VIEW)),
+    Op.CMP_CULTURE: (NumberView, (_NUMBER, _CULTURE)),
+    Op.CMP_QUIZ: (None, ()),
+    Op.QUIZ_MODE: (QuizMode, (_QUIZ_MODE,)),
+    Op.QUIZ_ANSWER: (QuestionChoice, (_TEXT, _TEXT)),
+    Op.QUIZ_TOGGLE: (QuestionChoice, (_TEXT, _TEXT)),
+    Op.QUIZ_SUBMIT: (QuestionRef, (_TEXT,)),
+    Op.CMP_QUIZ_MODE: (QuizMode, (_QUIZ_MODE,)),
+    Op.CMP_QUIZ_ANSWER: (QuestionChoice, (_TEXT, _TEXT)),
+    Op.CMP_QUIZ_TOGGLE: (QuestionChoice, (_TEXT, _TEXT)),
+    Op.CMP_QUIZ_SUBMIT: (QuestionRef, (_TEXT,)),
+}
+
+
+def pack(op: Op, *values: str) -> str:
+    """Callback data for `op`: version tag, opcode and fields, e.g. "16:14:1"."""
+    _, fields = _LAYOUTS[op]
+    if len(values) != len(fields):
+        raise ValueError(f"{op.name} takes {len(fields)} fields, got {len(values)}")
+    parts = [f"{_VERSION_TAG}{to_base36(op)}"]
+    parts.extend(field.encode(value) for field, value in zip(fields, values))
+    data = SEPARATOR.join(parts)
+    if len(data.encode("utf-8")) > CALLBACK_DATA_LIMIT:
+        raise ValueError(f"callback data {data!r} is too long")
+    return data
+
+
+def unpack(data: str) -> Packet:
+    if not data.startswith(_VERSION_TAG):
+        raise StaleCallback(f"callback data {data!r} is not version {CALLBACK_VERSION}")
+    header, *parts = data.split(SEPARATOR)
+    try:
+        op = Op(from_base36(header[1:]))
+    except ValueError:
+        raise ValueError(f"unknown opcode in {data!r}") from None
+    payload_type, fields = _LAYOUTS[op]
+    if len(parts) != len(fields):
+        raise ValueError(f"{op.name} takes {len(fields)} fields, got {len(parts)}")
+    if payload_type is None:
+        return Packet(op)
+    return Packet(op, payload_type(*(field.decode(part) for field, part in zip(fields, parts))))
@@ -1,5 +1,8 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from bot.keyboards.callback_data import Op, pack
+from bot.keyboards.registry import shared_keyboard
+
 CULTURE_CODE_TO_LABEL = {
     "kazakh": "🇰🇿 Қазақ / Түркі",
     "islam": "☪️ Ислам",
@@ -22,11 +25,12 @@ CULTURE_ORDER = [
 ]
 
 
+@shared_keyboard
 def compare_numbers_keyboard(numbers: list[str]) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
     row: list[InlineKeyboardButton] = []
     for idx, num in enumerate(numbers, start=1):
-        row.append(InlineKeyboardButton(text=num, callback_data=f"cmp:num:{num}"))
+        row.append(InlineKeyboardButton(text=num, callback_data=pack(Op.CMP_NUMBER, num)))
         if idx % 3 == 0:
             rows.append(row)
             row = []
@@ -34,9 +38,9 @@ def compare_numbers_keyboard(numbers: list[str]) -> InlineKeyboardMarkup:
         rows.append(row)
 
     rows.append(
-        [InlineKeyboardButton(text="🧠 Салыстырмалы викторина", callback_data="cmp:quiz")]
+        [InlineKeyboardButton(text="🧠 Салыстырмалы викторина", callback_data=pack(Op.CMP_QUIZ))]
     )
-    rows.append([InlineKeyboardButton(text="⬅️ Мәзір", callback_data="menu")])
+    rows.append([InlineKeyboardButton(text="⬅️ Мәзір", callback_data=pack(Op.MENU))])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
@@ -46,7 +50,7 @@ def _culture_rows(number: str) -> list[list[InlineKeyboardButton]]:
     for code in CULTURE_ORDER:
         label = CULTURE_CODE_TO_LABEL.get(code, code)
         row.append(
-            InlineKeyboardButton(text=label, callback_data=f"cmp:cul:{number}:{code}")
+            InlineKeyboardButton(text=label, callback_data=pack(Op.CMP_CULTURE, number, code))
         )
         if len(row) == 2:
             rows.append(row)
@@ -58,17 +62,17 @@ def _culture_rows(number: str) -> list[list[InlineKeyboardButton]]:
 
 def compare_info_keyboard(number: str, view: str) -> InlineKeyboardMarkup:
     view_buttons = [
-        InlineKeyboardButton(text="🌍 Салыстыру (қысқа)", callback_data=f"cmp:view:{number}:compare"),
-        InlineKeyboardButton(text="📖 Толық барлық мәдениет", callback_data=f"cmp:view:{number}:full"),
+        InlineKeyboardButton(text="🌍 Салыстыру (қысқа)", callback_data=pack(Op.CMP_VIEW, number, "compare")),
+        InlineKeyboardButton(text="📖 Толық барлық мәдениет", callback_data=pack(Op.CMP_VIEW, number, "full")),
     ]
     return InlineKeyboardMarkup(
         inline_keyboard=[
             *_culture_rows(number),
             view_buttons,
             [
-                InlineKeyboardButton(text="⬅️ Сандар тізімі", callback_data="cmp:list"),
-                InlineKeyboardButton(text="🧠 Салыстырмалы викторина", callback_data="cmp:quiz"),
+                InlineKeyboardButton(text="⬅️ Сандар тізімі", callback_data=pack(Op.CMP_LIST)),
+                InlineKeyboardButton(text="🧠 Салыстырмалы викторина", callback_data=pack(Op.CMP_QUIZ)),
             ],
-            [InlineKeyboardButton(text="⬅️ Мәзір", callback_data="menu")],
+            [InlineKeyboardButton(text="⬅️ Мәзір", callback_data=pack(Op.MENU))],
         ]
     )
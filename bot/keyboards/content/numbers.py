@@ -1,18 +1,22 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from bot.keyboards.callback_data import Op, pack
+from bot.keyboards.registry import shared_keyboard
 
+
+@shared_keyboard
 def numbers_keyboard(numbers: list[str]) -> InlineKeyboardMarkup:
     rows = []
     row = []
     for idx, num in enumerate(numbers, start=1):
-        row.append(InlineKeyboardButton(text=num, callback_data=f"num:{num}"))
+        row.append(InlineKeyboardButton(text=num, callback_data=pack(Op.NUM_SHOW, num)))
         if idx % 3 == 0:
             rows.append(row)
             row = []
     if row:
         rows.append(row)
 
-    rows.append([InlineKeyboardButton(text="🎲 Кездейсоқ сан көру", callback_data="num:random")])
+    rows.append([InlineKeyboardButton(text="🎲 Кездейсоқ сан көру", callback_data=pack(Op.NUM_RANDOM))])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
@@ -21,17 +25,17 @@ def number_info_keyboard(number: str, mode: str) -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text="Ақпарат: Қысқа / Толық",
-                callback_data=f"num:toggle:{number}:{mode}",
+                callback_data=pack(Op.NUM_TOGGLE, number, mode),
             )
         ],
     ]
 
     rows.extend(
         [
-            [InlineKeyboardButton(text="Келесі сан", callback_data="num:next")],
+            [InlineKeyboardButton(text="Келесі сан", callback_data=pack(Op.NUM_NEXT))],
             [
-                InlineKeyboardButton(text="⬅️ Сандар тізімі", callback_data="num:list"),
-                InlineKeyboardButton(text="⬅️ Мәзір", callback_data="menu"),
+                InlineKeyboardButton(text="⬅️ Сандар тізімі", callback_data=pack(Op.NUM_LIST)),
+                InlineKeyboardButton(text="⬅️ Мәзір", callback_data=pack(Op.MENU)),
             ],
         ]
     )
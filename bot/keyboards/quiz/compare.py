@@ -3,27 +3,29 @@ from typing import Optional
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from bot.constants import MODE_LABELS
+from bot.keyboards.callback_data import Op, pack
+from bot.keyboards.registry import shared_keyboard
 
 
+@shared_keyboard
 def compare_mode_keyboard() -> InlineKeyboardMarkup:
     buttons = [
         [
-            InlineKeyboardButton(text=MODE_LABELS["easy"], callback_data="cmpmode:easy"),
-            InlineKeyboardButton(text=MODE_LABELS["medium"], callback_data="cmpmode:medium"),
+            InlineKeyboardButton(text=MODE_LABELS["easy"], callback_data=pack(Op.CMP_QUIZ_MODE, "easy")),
+            InlineKeyboardButton(text=MODE_LABELS["medium"], callback_data=pack(Op.CMP_QUIZ_MODE, "medium")),
         ],
         [
-            InlineKeyboardButton(text=MODE_LABELS["hard"], callback_data="cmpmode:hard"),
-            InlineKeyboardButton(text=MODE_LABELS["mixed"], callback_data="cmpmode:mixed"),
+            InlineKeyboardButton(text=MODE_LABELS["hard"], callback_data=pack(Op.CMP_QUIZ_MODE, "hard")),
+            InlineKeyboardButton(text=MODE_LABELS["mixed"], callback_data=pack(Op.CMP_QUIZ_MODE, "mixed")),
         ],
-        [InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data="menu")],
+        [InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data=pack(Op.MENU))],
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def compare_question_keyboard(
-    question: dict, index: int, selected: Optional[set] = None
-) -> InlineKeyboardMarkup:
+def compare_question_keyboard(question: dict, selected: Optional[set] = None) -> InlineKeyboardMarkup:
     selected = selected or set()
+    question_id = question["id"]
     options = question.get("options", {})
     correct = question.get("correct", [])
     is_multi = question.get("multi", False) or len(correct) > 1
@@ -34,10 +36,10 @@ def compare_question_keyboard(
         if is_multi:
             prefix = "✅" if key in selected else "☑️"
             text = f"{prefix} {key}) {label}"
-            callback = f"cmp:toggle:{index}:{key}"
+            callback = pack(Op.CMP_QUIZ_TOGGLE, question_id, key)
         else:
             text = f"{key}) {label}"
-            callback = f"cmp:ans:{index}:{key}"
+            callback = pack(Op.CMP_QUIZ_ANSWER, question_id, key)
         buttons.append([InlineKeyboardButton(text=text, callback_data=callback)])
 
     if is_multi:
@@ -45,12 +47,12 @@ def compare_question_keyboard(
             [
                 InlineKeyboardButton(
                     text="Жауапты бекіту",
-                    callback_data=f"cmp:submit:{index}",
+                    callback_data=pack(Op.CMP_QUIZ_SUBMIT, question_id),
                 )
             ]
         )
 
     buttons.append(
-        [InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data="menu")]
+        [InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data=pack(Op.MENU))]
     )
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -3,25 +3,29 @@ from typing import Optional
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from bot.constants import MODE_LABELS
+from bot.keyboards.callback_data import Op, pack
+from bot.keyboards.registry import shared_keyboard
 
 
+@shared_keyboard
 def mode_keyboard() -> InlineKeyboardMarkup:
     buttons = [
         [
-            InlineKeyboardButton(text=MODE_LABELS["easy"], callback_data="mode:easy"),
-            InlineKeyboardButton(text=MODE_LABELS["medium"], callback_data="mode:medium"),
+            InlineKeyboardButton(text=MODE_LABELS["easy"], callback_data=pack(Op.QUIZ_MODE, "easy")),
+            InlineKeyboardButton(text=MODE_LABELS["medium"], callback_data=pack(Op.QUIZ_MODE, "medium")),
         ],
         [
-            InlineKeyboardButton(text=MODE_LABELS["hard"], callback_data="mode:hard"),
-            InlineKeyboardButton(text=MODE_LABELS["mixed"], callback_data="mode:mixed"),
+            InlineKeyboardButton(text=MODE_LABELS["hard"], callback_data=pack(Op.QUIZ_MODE, "hard")),
+            InlineKeyboardButton(text=MODE_LABELS["mixed"], callback_data=pack(Op.QUIZ_MODE, "mixed")),
         ],
-        [InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data="menu")],
+        [InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data=pack(Op.MENU))],
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def question_keyboard(question: dict, index: int, selected: Optional[set] = None) -> InlineKeyboardMarkup:
+def question_keyboard(question: dict, selected: Optional[set] = None) -> InlineKeyboardMarkup:
     selected = selected or set()
+    question_id = question["id"]
     options = question.get("options", {})
     correct = question.get("correct", [])
     is_multi = question.get("multi", False) or len(correct) > 1
@@ -32,16 +36,16 @@ def question_keyboard(question: dict, index: int, selected: Optional[set] = None
         if is_multi:
             prefix = "✅" if key in selected else "☑️"
             text = f"{prefix} {key}) {label}"
-            callback = f"toggle:{index}:{key}"
+            callback = pack(Op.QUIZ_TOGGLE, question_id, key)
         else:
             text = f"{key}) {label}"
-            callback = f"ans:{index}:{key}"
+            callback = pack(Op.QUIZ_ANSWER, question_id, key)
         buttons.append([InlineKeyboardButton(text=text, callback_data=callback)])
 
     if is_multi:
         buttons.append(
-            [InlineKeyboardButton(text="Жауапты бекіту", callback_data=f"submit:{index}")]
+            [InlineKeyboardButton(text="Жауапты бекіту", callback_data=pack(Op.QUIZ_SUBMIT, question_id))]
         )
 
-    buttons.append([InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data="menu")])
+    buttons.append([InlineKeyboardButton(text="⬅️ Мәзірге қайту", callback_data=pack(Op.MENU))])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -0,0 +1,72 @@
+from functools import wraps
+from typing import Callable, Union
+
+from aiogram.types import InlineKeyboardMarkup, ReplyKeyboardMarkup
+
+from bot.keyboards.callback_data import CALLBACK_DATA_LIMIT
+
+Keyboard = Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]
+
+# Parametrised keyboards keep this many argument combinations each.
+KEYBOARD_CACHE_SIZE = 16
+
+
+def _validate(name: str, keyboard: Keyboard) -> None:
+    rows = keyboard.inline_keyboard if isinstance(keyboard, InlineKeyboardMarkup) else keyboard.keyboard
+    if not rows or not all(rows):
+        raise RuntimeError(f"Keyboard {name} has an empty row")
+    for row in rows:
+        for button in row:
+            if not button.text:
+                raise RuntimeError(f"Keyboard {name} has a button without text")
+            data = getattr(button, "callback_data", None)
+            if data is not None and len(data.encode("utf-8")) > CALLBACK_DATA_LIMIT:
+                raise RuntimeError(f"Keyboard {name}: callback data {data!r} is too long")
+
+
+def _cache_key(args: tuple) -> tuple:
+    return tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+
+
+class KeyboardRegistry:
+    """Builds each keyboard once and hands out the same instance.
+
+    Keyboards are pydantic models; most of them never change, so building
+    them per message only costs allocations. A keyboard registered here is
+    validated (button text, callback data length) on first build; callers
+    share it and must not modify it. Keyboards that take arguments are
+    cached per argument tuple.
+    `build_all()` builds the argument-free ones up front, so a broken
+    keyboard fails at startup instead of on the first user who opens it.
+    """
+
+    def __init__(self) -> None:
+        self._static: dict[str, Callable[[], Keyboard]] = {}
+
+    def __call__(self, builder: Callable[..., Keyboard]) -> Callable[..., Keyboard]:
+        name = f"{builder.__module__}.{builder.__qualname__}"
+        cache: dict[tuple, Keyboard] = {}
+
+        @wraps(builder)
+        def shared(*args) -> Keyboard:
+            key = _cache_key(args)
+            keyboard = cache.get(key)
+            if keyboard is None:
+                keyboard = builder(*args)
+                _validate(name, keyboard)
+                if len(cache) >= KEYBOARD_CACHE_SIZE:
+                    cache.pop(next(iter(cache)))
+                cache[key] = keyboard
+            return keyboard
+
+        if builder.__code__.co_argcount == 0:
+            self._static[name] = shared
+        return shared
+
+    def build_all(self) -> int:
+        for shared in self._static.values():
+            shared()
+        return len(self._static)
+
+
+shared_keyboard = KeyboardRegistry()
@@ -11,8 +11,10 @@ from bot.constants import (
     MENU_FEEDBACK,
     MENU_BACK,
 )
+from bot.keyboards.registry import shared_keyboard
 
 
+@shared_keyboard
 def main_menu_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -25,6 +27,7 @@ def main_menu_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@shared_keyboard
 def back_menu_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[[KeyboardButton(text=MENU_BACK)]],
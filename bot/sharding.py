@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from hmac import compare_digest
+from typing import Any, Callable, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetUpdates
+
+from bot.app import create_bot, create_dispatcher
+from bot.config import Settings
+from bot.handlers import router
+from bot.utils.persistence import io_worker, run_io
+from bot.utils.stats_aggregator import get_stats_aggregator
+from bot.utils.stats_store import get_stats_store
+from bot.webhook import SECRET_HEADER, add_health_routes, bad_request, read_update, serve, set_webhook
+
+logger = logging.getLogger(__name__)
+
+# Updates buffered per worker before the supervisor has to wait.
+WORKER_QUEUE_SIZE = 1000
+# Updates a worker handles concurrently (across different users).
+WORKER_MAX_IN_FLIGHT = 100
+# Workers only see their own users' quizzes, so they reload the shared
+# leaderboard from the stats store this often (seconds).
+LEADERBOARD_REFRESH_INTERVAL = 30.0
+WORKER_STOP_TIMEOUT = 15.0
+POLLING_TIMEOUT = 30
+
+SessionFactory = Callable[[], BaseSession]
+
+
+def shard_key(update: dict) -> int:
+    """The id an update is routed by: its user, else its chat, else update_id."""
+    for payload in update.values():
+        if not isinstance(payload, dict):
+            continue
+        user = payload.get("from") or payload.get("user")
+        if user:
+            return user["id"]
+        chat = payload.get("chat") or (payload.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+    return update.get("update_id", 0)
+
+
+class _OrderedFeeder:
+    """Feeds updates into the dispatcher, one at a time per shard key.
+
+    Updates of different users run concurrently, but a user's updates wait
+    in a queue of their own and run one after another, so FSM transitions
+    happen in the order Telegram delivered them. A user holds one in-flight
+    slot only while one of their updates is running, so a burst from one
+    user cannot use up the slots of everyone else. `submit` waits once
+    `max_queued` updates are waiting to run.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        max_in_flight: int = WORKER_MAX_IN_FLIGHT,
+        max_queued: int = WORKER_QUEUE_SIZE,
+    ) -> None:
+        self._dp = dp
+        self._bot = bot
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._queued = asyncio.Semaphore(max_queued)
+        self._queues: dict[int, deque] = {}
+        self._runners: set[asyncio.Task] = set()
+
+    async def submit(self, key: int, update: dict) -> None:
+        await self._queued.acquire()
+        pending = self._queues.get(key)
+        if pending is not None:
+            pending.append(update)
+            return
+        self._queues[key] = deque([update])
+        runner = asyncio.create_task(self._run(key))
+        self._runners.add(runner)
+        runner.add_done_callback(self._runners.discard)
+
+    async def _run(self, key: int) -> None:
+        pending = self._queues[key]
+        async with self._slots:
+            while True:
+                update = pending.popleft()
+                self._queued.release()
+                try:
+                    await self._dp.feed_raw_update(self._bot, update)
+                except Exception:
+                    logger.exception("Update %s failed", update.get("update_id"))
+                if not pending:
+                    del self._queues[key]
+                    return
+
+    async def drain(self) -> None:
+        if self._runners:
+            await asyncio.wait(set(self._runners))
+
+
+async def _run_worker(settings: Settings, inbox, ready, session_factory: Optional[SessionFactory]) -> None:
+    bot = create_bot(settings, session_factory() if session_factory else None)
+    dp = create_dispatcher(settings)
+    get_stats_aggregator().leaderboard_refresh_interval = LEADERBOARD_REFRESH_INTERVAL
+    await dp.emit_startup(bot=bot, bots=[bot], dispatcher=dp, **dp.workflow_data)
+    ready.set()
+
+    feeder = _OrderedFeeder(dp, bot)
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="shard-inbox") as reader:
+        try:
+            while True:
+                item = await loop.run_in_executor(reader, inbox.get)
+                if item is None:
+                    break
+                await feeder.submit(*item)
+            await feeder.drain()
+        finally:
+            await dp.emit_shutdown(bot=bot, bots=[bot], dispatcher=dp, **dp.workflow_data)
+            await bot.session.close()
+
+
+def _worker_main(index: int, settings: Settings, inbox, ready, session_factory: Optional[SessionFactory]) -> None:
+    # The supervisor owns shutdown: it stops workers by closing their inboxes.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format=f"[worker {index}] %(levelname)s:%(name)s:%(message)s")
+    if settings.metrics_port:
+        settings = replace(settings, metrics_port=settings.metrics_port + index)
+    asyncio.run(_run_worker(settings, inbox, ready, session_factory))
+
+
+class ShardSupervisor:
+    """Runs `workers` bot processes and routes every update to one of them.
+
+    The shard is `shard_key(update) % workers`, so all updates of a user land
+    in the same process (which keeps in-memory FSM storage usable) and are
+    handled there in order. State shared between users — stats, leaderboard,
+    feedback — goes through the persistent stores.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        workers: int,
+        session_factory: Optional[SessionFactory] = None,
+        queue_size: int = WORKER_QUEUE_SIZE,
+    ) -> None:
+        self._settings = settings
+        self._workers = workers
+        self._session_factory = session_factory
+        self._queue_size = queue_size
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes: list[Any] = []
+        self._processes: list[multiprocessing.process.BaseProcess] = []
+
+    async def start(self) -> None:
+        # Create (and migrate) the shared stats database once, before any
+        # worker can race on it.
+        await run_io(get_stats_store)
+        events = []
+        for index in range(self._workers):
+            inbox = self._context.Queue(self._queue_size)
+            ready = self._context.Event()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(index, self._settings, inbox, ready, self._session_factory),
+                name=f"bot-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+            events.append(ready)
+        loop = asyncio.get_running_loop()
+        for process, ready in zip(self._processes, events):
+            while not await loop.run_in_executor(None, ready.wait, 1.0):
+                if not process.is_alive():
+                    raise RuntimeError(f"{process.name} exited during startup")
+
+    async def dispatch(self, update: dict) -> None:
+        key = shard_key(update)
+        inbox = self._inboxes[key % self._workers]
+        try:
+            inbox.put_nowait((key, update))
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, inbox.put, (key, update))
+
+    async def close(self) -> None:
+        """Let workers finish their queued updates, then stop them."""
+        loop = asyncio.get_running_loop()
+        for inbox in self._inboxes:
+            await loop.run_in_executor(None, inbox.put, None)
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning("%s did not stop in time; terminating", process.name)
+                process.terminate()
+        self._inboxes.clear()
+        self._processes.clear()
+        await io_worker.close()
+
+
+async def _poll(bot: Bot, supervisor: ShardSupervisor, allowed_updates: list[str]) -> None:
+    offset = None
+    while True:
+        try:
+            updates = await bot(
+                GetUpdates(offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates)
+            )
+        except Exception:
+            logger.exception("getUpdates failed; retrying")
+            await asyncio.sleep(1.0)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            await supervisor.dispatch(update.model_dump(mode="json", by_alias=True, exclude_none=True))
+
+
+async def _run_polling(bot: Bot, supervisor: ShardSupervisor, allowed_updates: list[str]) -> None:
+    await bot.delete_webhook()
+    poller = asyncio.create_task(_poll(bot, supervisor, allowed_updates))
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    poller.cancel()
+    try:
+        await poller
+    except asyncio.CancelledError:
+        pass
+
+
+async def _run_webhook(bot: Bot, supervisor: ShardSupervisor, settings: Settings, allowed_updates: list[str]) -> None:
+    async def handle_update(request: web.Request) -> web.Response:
+        if not compare_digest(request.headers.get(SECRET_HEADER, ""), settings.webhook_secret):
+            return web.Response(status=401, text="Unauthorized")
+        update = await read_update(request)
+        if update is None:
+            return bad_request()
+        try:
+            await supervisor.dispatch(update)
+        except (KeyError, TypeError):
+            # A "from" or "chat" without a usable id.
+            return bad_request()
+        return web.Response()
+
+    async def on_startup(app: web.Application) -> None:
+        await set_webhook(bot, settings, allowed_updates)
+
+    app = web.Application()
+    app.router.add_post(settings.webhook_path, handle_update)
+    app.on_startup.append(on_startup)
+    add_health_routes(app)
+    await serve(app, settings)
+
+
+async def run_sharded(settings: Settings, session_factory: Optional[SessionFactory] = None) -> None:
+    supervisor = ShardSupervisor(settings, settings.workers, session_factory)
+    bot = create_bot(settings, session_factory() if session_factory else None)
+    allowed_updates = router.resolve_used_update_types()
+    await supervisor.start()
+    logger.info("Started %d worker processes", settings.workers)
+    try:
+        if settings.bot_mode == "webhook":
+            await _run_webhook(bot, supervisor, settings, allowed_updates)
+        else:
+            await _run_polling(bot, supervisor, allowed_updates)
+    finally:
+        await supervisor.close()
+        await bot.session.close()
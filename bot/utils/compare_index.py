@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+COMPARE_NUMBERS = ["3", "5", "7", "9", "40"]
+CULTURE_CODE_TO_PLAIN = {
+    "kazakh": "Қазақ / Түркі",
+    "islam": "Ислам",
+    "christ": "Христиан",
+    "persian": "Парсы",
+    "hindu": "Үнді",
+    "china": "Қытай",
+    "mongol": "Моңғол",
+    "summary": "Қысқаша салыстыру",
+}
+CULTURE_KEYS = list(CULTURE_CODE_TO_PLAIN.values())
+PLAIN_TO_CULTURE_CODE = {plain: code for code, plain in CULTURE_CODE_TO_PLAIN.items()}
+SHORT_TEXT_LIMIT = 320
+
+
+@dataclass(frozen=True)
+class CultureBlock:
+    code: str
+    label: str
+    text: str
+    short_text: str
+
+
+@dataclass(frozen=True)
+class CompareSection:
+    number: str
+    header: str
+    raw: str
+    blocks: tuple[CultureBlock, ...]
+    by_code: Mapping[str, CultureBlock]
+
+    def block(self, code: str) -> Optional[CultureBlock]:
+        return self.by_code.get(code)
+
+
+@dataclass(frozen=True)
+class CompareIndex:
+    sections: Mapping[str, CompareSection]
+    blocks: Mapping[tuple[str, str], CultureBlock]
+
+    def section(self, number: str) -> Optional[CompareSection]:
+        return self.sections.get(number)
+
+    def block(self, number: str, code: str) -> Optional[CultureBlock]:
+        return self.blocks.get((number, code))
+
+
+def _split_sections(text: str) -> dict[str, str]:
+    lines = text.splitlines()
+    starts: list[tuple[int, str]] = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        for number in COMPARE_NUMBERS:
+            if stripped.startswith(f"{number} саны"):
+                starts.append((i, number))
+                break
+
+    sections: dict[str, str] = {}
+    for pos, (start_idx, number) in enumerate(starts):
+        if number in sections:
+            continue
+        end_idx = starts[pos + 1][0] if pos + 1 < len(starts) else len(lines)
+        section = "\n".join(lines[start_idx:end_idx]).strip()
+        for stop_marker in ("<hr>", "Қорытынды:"):
+            if stop_marker in section:
+                section = section.split(stop_marker, 1)[0].strip()
+        sections[number] = section
+    return sections
+
+
+def _match_culture(label: str) -> Optional[str]:
+    for key in CULTURE_KEYS:
+        if label.startswith(key):
+            return key
+    return None
+
+
+def _parse_cultures(section: str) -> tuple[str, list[dict]]:
+    lines = [line.rstrip() for line in section.splitlines()]
+    if not lines:
+        return "", []
+    header = lines[0].strip()
+    blocks: list[dict] = []
+    current: Optional[dict] = None
+
+    for line in lines[1:]:
+        stripped = line.strip()
+        if not stripped:
+            if current and current["text"]:
+                current["text"].append("")
+            continue
+
+        if ":" in stripped:
+            label, rest = stripped.split(":", 1)
+            key = _match_culture(label.strip())
+            if key:
+                if current:
+                    current["text"] = "\n".join(current["text"]).strip()
+                    blocks.append(current)
+                current = {
+                    "key": key,
+                    "label": label.strip(),
+                    "text": [rest.strip()],
+                }
+                continue
+
+        if current:
+            current["text"].append(stripped)
+
+    if current:
+        current["text"] = "\n".join(current["text"]).strip()
+        blocks.append(current)
+
+    return header, blocks
+
+
+def shorten_text(text: str, max_chars: int = SHORT_TEXT_LIMIT) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    for sep in [". ", "! ", "? ", "… "]:
+        idx = cut.rfind(sep)
+        if idx > 50:
+            cut = cut[: idx + len(sep.strip())]
+            break
+    return cut.rstrip() + "..."
+
+
+def _build_section(number: str, raw: str) -> CompareSection:
+    header, parsed = _parse_cultures(raw)
+    blocks = tuple(
+        CultureBlock(
+            code=PLAIN_TO_CULTURE_CODE[block["key"]],
+            label=block["label"],
+            text=block["text"],
+            short_text=shorten_text(block["text"]),
+        )
+        for block in parsed
+    )
+    by_code: dict[str, CultureBlock] = {}
+    for block in blocks:
+        by_code.setdefault(block.code, block)
+    return CompareSection(
+        number=number,
+        header=header,
+        raw=raw,
+        blocks=blocks,
+        by_code=MappingProxyType(by_code),
+    )
+
+
+def build_compare_index(text: str) -> CompareIndex:
+    sections: dict[str, CompareSection] = {}
+    blocks: dict[tuple[str, str], CultureBlock] = {}
+    for number, raw in _split_sections(text).items():
+        if not raw:
+            continue
+        section = _build_section(number, raw)
+        sections[number] = section
+        for code, block in section.by_code.items():
+            blocks[(number, code)] = block
+    return CompareIndex(
+        sections=MappingProxyType(sections),
+        blocks=MappingProxyType(blocks),
+    )
+
+
+EMPTY_COMPARE_INDEX = build_compare_index("")
@@ -0,0 +1,151 @@
+import json
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: only one bot process writes there.
+    fcntl = None
+
+from bot.utils.loader import (
+    FEEDBACK_ARCHIVE_DIR,
+    FEEDBACK_LOG_PATH,
+    FEEDBACK_PATH,
+    load_legacy_feedback,
+)
+
+# The active journal is rotated once it grows past this size or when the
+# first entry of a new month arrives.
+ROTATE_MAX_BYTES = 1_000_000
+# Rotated files are numbered in write order: feedback-000001-<timestamp>.jsonl.
+_SEGMENT_NAME = re.compile(r"feedback-(\d{6})-")
+
+
+class FeedbackJournal:
+    """Append-only JSON Lines log of feedback entries.
+
+    Each entry is one line appended to the active file, so writing costs the
+    same no matter how much feedback exists. Full files are moved into the
+    archive directory. On first use the legacy feedback.json array is copied
+    into the journal, which from then on is the only source of truth.
+    Worker processes share the files, so rotation and the legacy import run
+    under an exclusive lock on a file next to the journal.
+    """
+
+    def __init__(
+        self,
+        path: Path = FEEDBACK_LOG_PATH,
+        archive_dir: Path = FEEDBACK_ARCHIVE_DIR,
+        legacy_path: Path = FEEDBACK_PATH,
+        max_bytes: int = ROTATE_MAX_BYTES,
+    ) -> None:
+        self._path = path
+        self._archive_dir = archive_dir
+        self._legacy_path = legacy_path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._lock_path = path.with_suffix(path.suffix + ".lock")
+        self._initialised = False
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._lock_path.open("a") as handle:
+            if fcntl is not None:
+                # Released when the handle is closed.
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def _segments(self) -> list[Path]:
+        if not self._archive_dir.exists():
+            return []
+        segments = self._archive_dir.glob("feedback-*.jsonl")
+        return sorted(segments, key=lambda path: (_segment_index(path), path.name))
+
+    def _ensure_initialised(self) -> None:
+        if self._initialised:
+            return
+        self._initialised = True
+        if self._path.exists() or self._segments():
+            return
+        legacy = load_legacy_feedback(self._legacy_path)
+        if legacy:
+            self._write_lines(legacy)
+
+    def _should_rotate(self, now: datetime) -> bool:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size >= self._max_bytes:
+            return True
+        modified = datetime.fromtimestamp(stat.st_mtime)
+        return (modified.year, modified.month) != (now.year, now.month)
+
+    def _rotate(self, now: datetime) -> None:
+        self._archive_dir.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        index = _segment_index(segments[-1]) + 1 if segments else 1
+        self._path.rename(self._archive_dir / f"feedback-{index:06d}-{now:%Y%m%d-%H%M%S}.jsonl")
+
+    def _write_lines(self, entries: list[dict]) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        payload = "".join(
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for entry in entries
+        )
+        with self._path.open("a", encoding="utf-8") as handle:
+            handle.write(payload)
+
+    def append(self, entry: dict) -> None:
+        with self._locked():
+            self._ensure_initialised()
+            now = datetime.now()
+            if self._should_rotate(now):
+                self._rotate(now)
+            self._write_lines([entry])
+
+    def __iter__(self) -> Iterator[dict]:
+        # Read under the lock so a concurrent rotation cannot hide a file.
+        with self._locked():
+            self._ensure_initialised()
+            texts = [
+                path.read_text(encoding="utf-8")
+                for path in [*self._segments(), self._path]
+                if path.exists()
+            ]
+        for text in texts:
+            for line in text.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line after a crash; skip it.
+                    continue
+
+    def export(self, target: Path = FEEDBACK_PATH) -> int:
+        """Write every entry as one JSON array (the old feedback.json format)."""
+        entries = list(self)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(target)
+        return len(entries)
+
+
+def _segment_index(path: Path) -> int:
+    match = _SEGMENT_NAME.match(path.name)
+    return int(match.group(1)) if match else 0
+
+
+feedback_journal = FeedbackJournal()
+
+
+def append_feedback(entry) -> None:
+    feedback_journal.append(entry)
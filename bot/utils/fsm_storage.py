@@ -0,0 +1,299 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from copy import copy
+from pathlib import Path
+from typing import Any, AsyncIterator, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorageRecord
+
+from bot.config import Settings
+from bot.utils.loader import FSM_DB_PATH
+from bot.utils.persistence import run_io
+
+# Expired sessions are deleted at most this often (seconds).
+PURGE_INTERVAL = 300.0
+# How often (seconds) the in-memory storage looks for idle sessions.
+SWEEP_INTERVAL = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fsm_updated_at ON fsm (updated_at);
+"""
+
+
+def dumps_compact(data: Mapping[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """In-process FSM storage with idle expiry and a cap on live sessions.
+
+    Sessions are kept in least-recently-used order. A background sweeper drops
+    sessions idle for longer than `idle_ttl`, and once `max_sessions` is
+    reached the least recently used one is evicted. Cleared sessions are
+    removed immediately instead of lingering as empty records.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 0,
+        max_sessions: int = 0,
+        sweep_interval: float = SWEEP_INTERVAL,
+    ) -> None:
+        self._idle_ttl = idle_ttl
+        self._max_sessions = max_sessions
+        self._sweep_interval = sweep_interval
+        self._records: OrderedDict[StorageKey, tuple[MemoryStorageRecord, float]] = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.evicted_idle = 0
+        self.evicted_overflow = 0
+
+    @property
+    def active_sessions(self) -> int:
+        return len(self._records)
+
+    def metrics(self) -> dict:
+        return {
+            "active_sessions": self.active_sessions,
+            "evicted_idle": self.evicted_idle,
+            "evicted_overflow": self.evicted_overflow,
+        }
+
+    def _get(self, key: StorageKey) -> Optional[MemoryStorageRecord]:
+        entry = self._records.get(key)
+        if entry is None:
+            return None
+        record, touched_at = entry
+        if self._idle_ttl and time.monotonic() - touched_at > self._idle_ttl:
+            del self._records[key]
+            self.evicted_idle += 1
+            return None
+        return record
+
+    def _put(self, key: StorageKey, record: MemoryStorageRecord) -> None:
+        if record.state is None and not record.data:
+            self._records.pop(key, None)
+            return
+        self._records[key] = (record, time.monotonic())
+        self._records.move_to_end(key)
+        while self._max_sessions and len(self._records) > self._max_sessions:
+            self._records.popitem(last=False)
+            self.evicted_overflow += 1
+        self._ensure_sweeper()
+
+    def _ensure_sweeper(self) -> None:
+        if self._idle_ttl and self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever())
+
+    def sweep(self) -> int:
+        deadline = time.monotonic() - self._idle_ttl
+        evicted = 0
+        # Oldest first; stop at the first session that is still fresh.
+        while self._records:
+            key, (_record, touched_at) = next(iter(self._records.items()))
+            if touched_at >= deadline:
+                break
+            del self._records[key]
+            evicted += 1
+        self.evicted_idle += evicted
+        return evicted
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            self.sweep()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = self._get(key) or MemoryStorageRecord()
+        record.state = _state_name(state)
+        self._put(key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = self._get(key)
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        record = self._get(key) or MemoryStorageRecord()
+        record.data = dict(data)
+        self._put(key, record)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        record = self._get(key)
+        return copy(record.data) if record else {}
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+
+class SqliteStorage(BaseStorage):
+    """FSM storage in a local SQLite file, safe to share between processes.
+
+    Queries run on the persistence worker thread. A session that has not been
+    written for `ttl` seconds is treated as empty and purged later on.
+    """
+
+    def __init__(self, path: Path = FSM_DB_PATH, ttl: int = 0) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._ttl = ttl
+        self._key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        self._last_purge = time.time()
+
+    def _expired(self, updated_at: float, now: float) -> bool:
+        return bool(self._ttl) and now - updated_at > self._ttl
+
+    def _read(self, key: str) -> tuple[Optional[str], str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, data, updated_at FROM fsm WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or self._expired(row[2], now):
+            return None, "{}"
+        return row[0], row[1]
+
+    def _write(self, key: str, column: str, value: Optional[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._upsert(key, column, value, now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _upsert(self, key: str, column: str, value: Optional[str], now: float) -> None:
+        if self._ttl:
+            # An expired session is empty: writing one column must not bring
+            # back the other.
+            self._conn.execute(
+                "DELETE FROM fsm WHERE key = ? AND updated_at < ?", (key, now - self._ttl)
+            )
+        self._conn.execute(
+            f"INSERT INTO fsm (key, {column}, updated_at) VALUES (?, ?, ?) "
+            f"ON CONFLICT(key) DO UPDATE SET {column} = excluded.{column}, "
+            "updated_at = excluded.updated_at",
+            (key, value, now),
+        )
+        # A cleared session leaves nothing behind.
+        self._conn.execute(
+            "DELETE FROM fsm WHERE key = ? AND state IS NULL AND data = '{}'", (key,)
+        )
+        if self._ttl and now - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = now
+            self._conn.execute("DELETE FROM fsm WHERE updated_at < ?", (now - self._ttl,))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await run_io(self._write, self._key_builder.build(key), "state", _state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _data = await run_io(self._read, self._key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await run_io(self._write, self._key_builder.build(key), "data", dumps_compact(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _state, data = await run_io(self._read, self._key_builder.build(key))
+        return json.loads(data)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class UserEventIsolation(BaseEventIsolation):
+    """Handles the updates of one FSM key (user in chat) one at a time.
+
+    Without it two taps of the same button run concurrently and both see
+    the state from before either of them. Unlike aiogram's
+    SimpleEventIsolation, a key's lock is dropped as soon as no update holds
+    or waits for it, so the locks do not grow with every user ever seen.
+    The lock only covers this process, so the memory and sqlite storages
+    assume that all updates of a user reach one process: a single bot, or
+    sharded workers, where each user is routed to one worker. Several bot
+    processes that each get any user's updates (e.g. webhook replicas behind
+    a load balancer) need FSM_STORAGE=redis, which locks in Redis instead.
+    """
+
+    def __init__(self) -> None:
+        # key -> (lock, updates holding or waiting for it)
+        self._locks: dict[StorageKey, list] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def close(self) -> None:
+        # Each lock goes away with the last update using it.
+        pass
+
+
+def create_event_isolation(storage: BaseStorage) -> BaseEventIsolation:
+    """The per-user update lock that fits `storage`."""
+    if hasattr(storage, "create_isolation"):
+        # RedisStorage: processes sharing the storage share the locks too.
+        return storage.create_isolation()
+    return UserEventIsolation()
+
+
+def _create_redis_storage(settings: Settings) -> BaseStorage:
+    try:
+        from aiogram.fsm.storage.redis import RedisStorage
+    except ImportError:
+        raise RuntimeError(
+            "FSM_STORAGE=redis needs the redis package: pip install redis"
+        ) from None
+
+    ttl = settings.fsm_ttl or None
+    return RedisStorage.from_url(
+        settings.redis_url,
+        state_ttl=ttl,
+        data_ttl=ttl,
+        json_dumps=dumps_compact,
+    )
+
+
+def create_fsm_storage(settings: Settings) -> BaseStorage:
+    if settings.fsm_storage == "sqlite":
+        return SqliteStorage(ttl=settings.fsm_ttl)
+    if settings.fsm_storage == "redis":
+        return _create_redis_storage(settings)
+    return BoundedMemoryStorage(
+        idle_ttl=settings.fsm_ttl,
+        max_sessions=settings.fsm_max_sessions,
+    )
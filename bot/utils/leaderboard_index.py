@@ -0,0 +1,74 @@
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Optional
+
+RankKey = tuple[int, int, int, str]
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    user_id: str
+    total_points: int
+    total_correct: int
+    quizzes_taken: int
+    stats: Mapping
+
+
+def _make_entry(user_id: str, stats: Mapping) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        user_id=user_id,
+        total_points=stats.get("total_points", 0) or 0,
+        total_correct=stats.get("total_correct", 0) or 0,
+        quizzes_taken=stats.get("quizzes_taken", 0) or 0,
+        stats=stats,
+    )
+
+
+def _rank_key(entry: LeaderboardEntry) -> RankKey:
+    # Negated so that ascending order is best-first; user_id breaks ties.
+    return (-entry.total_points, -entry.total_correct, -entry.quizzes_taken, entry.user_id)
+
+
+class LeaderboardIndex:
+    """Users ordered by (total_points, total_correct, quizzes_taken).
+
+    Keeps a sorted list of rank keys next to a user -> key map, so a rank is
+    one binary search and the top k is a slice of length k. Updating a user
+    removes and re-inserts a single key instead of re-sorting everyone; both
+    still shift the list, so an update is O(n), only with a small constant.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[RankKey] = []
+        self._entries: dict[str, LeaderboardEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, user_id: str, stats: Mapping) -> None:
+        entry = _make_entry(user_id, stats)
+        previous = self._entries.get(user_id)
+        self._entries[user_id] = entry
+        key = _rank_key(entry)
+        if previous is not None:
+            old_key = _rank_key(previous)
+            if old_key == key:
+                return
+            del self._keys[bisect_left(self._keys, old_key)]
+        insort(self._keys, key)
+
+    def rebuild(self, stats: Iterable[tuple[str, Mapping]]) -> None:
+        self._entries = {user_id: _make_entry(user_id, user_stats) for user_id, user_stats in stats}
+        self._keys = sorted(_rank_key(entry) for entry in self._entries.values())
+
+    def get(self, user_id: str) -> Optional[LeaderboardEntry]:
+        return self._entries.get(user_id)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return bisect_left(self._keys, _rank_key(entry)) + 1
+
+    def top(self, limit: int) -> list[LeaderboardEntry]:
+        return [self._entries[key[3]] for key in self._keys[:limit]]
@@ -1,16 +1,114 @@
+import asyncio
 import json
+import os
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Optional
+
+from bot.utils.compare_index import CompareIndex, EMPTY_COMPARE_INDEX, build_compare_index
+from bot.utils.persistence import run_io
+from bot.utils.question_bank import EMPTY_QUESTION_BANK, QuestionBank, build_question_bank
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = BASE_DIR / "data"
 CONTENT_DIR = DATA_DIR / "content"
-RUNTIME_DIR = DATA_DIR / "runtime"
+# Stats, feedback and caches written by the bot; RUNTIME_DIR in the
+# environment moves them elsewhere (benchmarks, a second instance).
+RUNTIME_DIR = Path(os.getenv("RUNTIME_DIR") or DATA_DIR / "runtime")
+ASSETS_DIR = BASE_DIR / "assets"
+NUMBER_ASSETS_DIR = ASSETS_DIR / "numbers"
+ASSET_MANIFEST_PATH = NUMBER_ASSETS_DIR / "manifest.json"
 QUESTIONS_PATH = CONTENT_DIR / "questions.json"
 SACRED_NUMBERS_PATH = CONTENT_DIR / "sacred_numbers.json"
 COMPARE_TEXT_PATH = CONTENT_DIR / "compare_text.txt"
 COMPARE_QUESTIONS_PATH = CONTENT_DIR / "compare_questions.json"
 STATS_PATH = RUNTIME_DIR / "stats.json"
+STATS_DB_PATH = RUNTIME_DIR / "stats.sqlite3"
+FSM_DB_PATH = RUNTIME_DIR / "fsm.sqlite3"
 FEEDBACK_PATH = RUNTIME_DIR / "feedback.json"
+FEEDBACK_LOG_PATH = RUNTIME_DIR / "feedback.jsonl"
+FEEDBACK_ARCHIVE_DIR = RUNTIME_DIR / "feedback"
+FILE_IDS_PATH = RUNTIME_DIR / "file_ids.json"
+
+# How often (seconds) cached content files are checked for a newer mtime.
+RELOAD_CHECK_INTERVAL = 2.0
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    mtime_ns: Optional[int]
+    value: Any
+
+
+class ContentRepository:
+    """Parsed content files served from memory.
+
+    Each file is parsed once into an immutable snapshot and `get()` never
+    touches the disk again. `refresh()` (run periodically off the event loop
+    by `watch_content()`) swaps in a new snapshot as a whole when a file's
+    mtime changes, so readers always get either the old or the new content
+    and never a partially loaded one.
+    """
+
+    def __init__(self) -> None:
+        self._snapshots: dict[tuple[Path, Callable], _Snapshot] = {}
+        self._defaults: dict[tuple[Path, Callable], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, parse: Callable[[str], Any], default: Any) -> Any:
+        key = (path, parse)
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            return snapshot.value
+        self._defaults[key] = default
+        return self._refresh(key, default)
+
+    def refresh(self) -> None:
+        for key, default in list(self._defaults.items()):
+            self._refresh(key, default)
+
+    def _refresh(self, key: tuple[Path, Callable], default: Any) -> Any:
+        path, parse = key
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            mtime_ns = _mtime_ns(path)
+            if snapshot is not None and snapshot.mtime_ns == mtime_ns:
+                return snapshot.value
+
+            if mtime_ns is None:
+                value = default
+            else:
+                try:
+                    value = parse(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    # The file may be mid-write; keep serving the last good snapshot.
+                    if snapshot is not None:
+                        return snapshot.value
+                    value = default
+
+            snapshot = _Snapshot(mtime_ns=mtime_ns, value=_freeze(value))
+            self._snapshots[key] = snapshot
+            return snapshot.value
+
+
+content = ContentRepository()
 
 
 def _load_json(path: Path, default):
@@ -24,39 +122,76 @@ def _load_json(path: Path, default):
 
 def _save_json(path: Path, payload) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(
+    # Written aside and renamed, so a reader never sees a half-written file.
+    tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+    tmp.write_text(
         json.dumps(payload, ensure_ascii=False, indent=2),
         encoding="utf-8",
     )
+    tmp.replace(path)
+
+
+def _parse_question_bank(text: str) -> QuestionBank:
+    return build_question_bank(_freeze(json.loads(text)))
 
 
-def load_questions():
-    return _load_json(QUESTIONS_PATH, [])
+def load_question_bank() -> QuestionBank:
+    return content.get(QUESTIONS_PATH, _parse_question_bank, EMPTY_QUESTION_BANK)
 
 
 def load_stats():
     return _load_json(STATS_PATH, {})
 
 
-def save_stats(stats) -> None:
-    _save_json(STATS_PATH, stats)
+def load_legacy_feedback(path: Path = FEEDBACK_PATH):
+    return _load_json(path, [])
 
 
-def append_feedback(entry) -> None:
-    feedback = _load_json(FEEDBACK_PATH, [])
-    feedback.append(entry)
-    _save_json(FEEDBACK_PATH, feedback)
+def load_file_ids():
+    return _load_json(FILE_IDS_PATH, {})
+
+
+def update_file_ids(changes: dict[str, Optional[str]]) -> dict[str, str]:
+    """Apply `changes` (None removes an entry) to file_ids.json as it is now.
+
+    Sharded workers upload images on their own; merging with the file keeps
+    the ids the other workers saved meanwhile. Returns the merged mapping.
+    """
+    file_ids = load_file_ids()
+    for key, file_id in changes.items():
+        if file_id is None:
+            file_ids.pop(key, None)
+        else:
+            file_ids[key] = file_id
+    _save_json(FILE_IDS_PATH, file_ids)
+    return file_ids
 
 
 def load_sacred_numbers():
-    return _load_json(SACRED_NUMBERS_PATH, {})
+    return content.get(SACRED_NUMBERS_PATH, json.loads, {})
+
+
+def load_compare_index() -> CompareIndex:
+    return content.get(COMPARE_TEXT_PATH, build_compare_index, EMPTY_COMPARE_INDEX)
+
+
+def load_compare_question_bank() -> QuestionBank:
+    return content.get(COMPARE_QUESTIONS_PATH, _parse_question_bank, EMPTY_QUESTION_BANK)
+
+
+def load_asset_manifest():
+    return content.get(ASSET_MANIFEST_PATH, json.loads, {})
 
 
-def load_compare_text() -> str:
-    if not COMPARE_TEXT_PATH.exists():
-        return ""
-    return COMPARE_TEXT_PATH.read_text(encoding="utf-8")
+def preload_content() -> None:
+    load_question_bank()
+    load_sacred_numbers()
+    load_compare_index()
+    load_compare_question_bank()
+    load_asset_manifest()
 
 
-def load_compare_questions():
-    return _load_json(COMPARE_QUESTIONS_PATH, [])
+async def watch_content(interval: float = RELOAD_CHECK_INTERVAL) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await run_io(content.refresh)
@@ -0,0 +1,244 @@
+import json
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+from aiohttp import web
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; one more bucket counts everything slower.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRIC_PREFIX = "kielisan"
+UNHANDLED = "unhandled"
+
+
+class Histogram:
+    """Latency histogram with the fixed `BUCKETS`.
+
+    Observations are only made from the event loop thread, so plain
+    increments are enough and no lock is taken.
+    """
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "buckets": {str(bound): count for bound, count in zip((*BUCKETS, "+Inf"), self.counts)},
+        }
+
+
+class HandlerStats:
+    __slots__ = ("wall", "io", "api", "errors")
+
+    def __init__(self) -> None:
+        self.wall = Histogram()
+        self.io = Histogram()
+        self.api = Histogram()
+        self.errors = 0
+
+
+class _Call:
+    """Time spent by the update currently being handled."""
+
+    __slots__ = ("handler", "io", "api")
+
+    def __init__(self) -> None:
+        self.handler = UNHANDLED
+        self.io = 0.0
+        self.api = 0.0
+
+
+_current_call: ContextVar[Optional[_Call]] = ContextVar("metrics_call", default=None)
+
+
+def add_io_time(seconds: float) -> None:
+    call = _current_call.get()
+    if call is not None:
+        call.io += seconds
+
+
+def add_api_time(seconds: float) -> None:
+    call = _current_call.get()
+    if call is not None:
+        call.api += seconds
+
+
+def current_handler() -> Optional[str]:
+    """Label of the handler of the update being processed, if any."""
+    call = _current_call.get()
+    return call.handler if call is not None else None
+
+
+class Metrics:
+    """Per-handler histograms plus counters collected from other components."""
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self._handlers: dict[str, HandlerStats] = {}
+        self._collectors: dict[str, Callable[[], dict]] = {}
+
+    def add_collector(self, name: str, collect: Callable[[], dict]) -> None:
+        """Include `collect()` (e.g. a component's `metrics()`) in every report."""
+        self._collectors[name] = collect
+
+    def record(self, call: _Call, wall: float, failed: bool) -> None:
+        stats = self._handlers.get(call.handler)
+        if stats is None:
+            stats = self._handlers[call.handler] = HandlerStats()
+        stats.wall.observe(wall)
+        stats.io.observe(call.io)
+        stats.api.observe(call.api)
+        if failed:
+            stats.errors += 1
+
+    def snapshot(self) -> dict:
+        uptime = time.time() - self.started_at
+        handled = sum(stats.wall.count for stats in self._handlers.values())
+        return {
+            "uptime_seconds": uptime,
+            "updates": handled,
+            "updates_per_second": handled / uptime if uptime else 0.0,
+            "handlers": {
+                name: {
+                    "calls": stats.wall.count,
+                    "errors": stats.errors,
+                    "wall_seconds": stats.wall.to_dict(),
+                    "io_seconds": stats.io.to_dict(),
+                    "api_seconds": stats.api.to_dict(),
+                }
+                for name, stats in sorted(self._handlers.items())
+            },
+            **{name: collect() for name, collect in self._collectors.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        for kind, help_text in (
+            ("wall", "Time to handle one update."),
+            ("io", "Time an update spent waiting for disk I/O."),
+            ("api", "Time an update spent in Telegram API calls."),
+        ):
+            metric = f"{METRIC_PREFIX}_handler_{kind}_seconds"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, stats in sorted(self._handlers.items()):
+                histogram: Histogram = getattr(stats, kind)
+                cumulative = 0
+                for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{handler="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{handler="{name}"}} {histogram.total:.6f}')
+                lines.append(f'{metric}_count{{handler="{name}"}} {histogram.count}')
+
+        metric = f"{METRIC_PREFIX}_handler_errors_total"
+        lines.append(f"# HELP {metric} Updates whose handler raised.")
+        lines.append(f"# TYPE {metric} counter")
+        for name, stats in sorted(self._handlers.items()):
+            lines.append(f'{metric}{{handler="{name}"}} {stats.errors}')
+
+        for component, collect in self._collectors.items():
+            for key, value in collect().items():
+                if isinstance(value, (int, float)):
+                    metric = f"{METRIC_PREFIX}_{component}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class UpdateTimer(BaseMiddleware):
+    """Outer update middleware: times every update and records it per handler."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        call = _Call()
+        token = _current_call.set(call)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _current_call.reset(token)
+            metrics.record(call, time.perf_counter() - started, failed)
+
+
+async def name_handler(
+    handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+    event: TelegramObject,
+    data: dict[str, Any],
+) -> Any:
+    """Inner middleware: labels the current update with the handler that got it."""
+    call = _current_call.get()
+    if call is not None:
+        packet = data.get("packet")
+        if packet is not None:
+            call.handler = packet.op.name.lower()
+        else:
+            callback = data["handler"].callback
+            # Methods of a named owner (e.g. one of the quiz engines) get its name as a prefix.
+            owner = getattr(getattr(callback, "__self__", None), "name", None)
+            call.handler = f"{owner}_{callback.__name__}" if owner else callback.__name__
+    return await handler(event, data)
+
+
+class ApiTimer(BaseRequestMiddleware):
+    """Bot session middleware: adds each API round trip to the current update."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            add_api_time(time.perf_counter() - started)
+
+
+async def _metrics_text(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def _metrics_json(request: web.Request) -> web.Response:
+    return web.Response(text=json.dumps(metrics.snapshot(), ensure_ascii=False), content_type="application/json")
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics_text)
+    app.router.add_get("/metrics.json", _metrics_json)
+    runner = web.AppRunner(app, handle_signals=False, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics available on http://%s:%s/metrics", host, port)
+    return runner
@@ -0,0 +1,120 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from bot.utils.metrics import add_io_time
+
+# Jobs allowed to be queued or running at once; callers beyond this wait.
+MAX_PENDING_JOBS = 256
+
+
+def _resolve(future: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class IOWorker:
+    """Runs blocking persistence calls on one dedicated thread.
+
+    Handlers await `run()` instead of touching the disk themselves. The number
+    of outstanding jobs is bounded: once the limit is reached new callers wait
+    asynchronously for a free slot, so a slow disk slows down writers but never
+    blocks the event loop.
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING_JOBS, name: str = "io-worker") -> None:
+        self._name = name
+        self._max_pending = max_pending
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._slots = asyncio.Semaphore(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._pending = 0
+        self._max_seen = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._backpressure_waits = 0
+        self._queue_wait_total = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._work, name=self._name, daemon=True)
+            self._thread.start()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            func, args, kwargs, loop, future, enqueued_at = job
+            self._queue_wait_total += time.perf_counter() - enqueued_at
+            result, error = None, None
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as exc:
+                error = exc
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:
+                # The loop is already closed; nobody is waiting for the result.
+                pass
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        self._ensure_started()
+        if self._slots.locked():
+            self._backpressure_waits += 1
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending += 1
+        self._submitted += 1
+        self._max_seen = max(self._max_seen, self._pending)
+        self._queue.put((func, args, kwargs, loop, future, time.perf_counter()))
+        try:
+            result = await future
+        except BaseException:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            self._slots.release()
+        self._completed += 1
+        return result
+
+    def metrics(self) -> dict:
+        completed = self._completed + self._failed
+        return {
+            "queue_depth": self._pending,
+            "queue_depth_max": self._max_seen,
+            "queue_limit": self._max_pending,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "backpressure_waits": self._backpressure_waits,
+            "avg_queue_wait_ms": (self._queue_wait_total / completed * 1000) if completed else 0.0,
+        }
+
+    async def close(self) -> None:
+        """Let queued jobs finish, then stop the worker thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        self._thread = None
+
+
+io_worker = IOWorker()
+
+
+async def run_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    started = time.perf_counter()
+    try:
+        return await io_worker.run(func, *args, **kwargs)
+    finally:
+        add_io_time(time.perf_counter() - started)
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class QuestionBank:
+    """Questions of one quiz in file order, addressable by their stable id."""
+
+    questions: tuple[Mapping, ...]
+    by_id: Mapping[str, Mapping]
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def get(self, question_id: str) -> Optional[Mapping]:
+        return self.by_id.get(question_id)
+
+    def ids(self, level: Optional[str] = None) -> list[str]:
+        return [
+            question["id"]
+            for question in self.questions
+            if level is None or question.get("level") == level
+        ]
+
+
+def build_question_bank(questions: Iterable[Mapping]) -> QuestionBank:
+    ordered: list[Mapping] = []
+    by_id: dict[str, Mapping] = {}
+    for position, question in enumerate(questions, start=1):
+        question_id = question.get("id") or str(position)
+        if question_id in by_id:
+            continue
+        if question.get("id") != question_id:
+            question = MappingProxyType({**question, "id": question_id})
+        ordered.append(question)
+        by_id[question_id] = question
+    return QuestionBank(questions=tuple(ordered), by_id=MappingProxyType(by_id))
+
+
+EMPTY_QUESTION_BANK = build_question_bank(())
@@ -0,0 +1,69 @@
+from typing import Callable, Mapping, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.utils.question_bank import QuestionBank
+
+KeyboardBuilder = Callable[[Mapping, set], InlineKeyboardMarkup]
+
+
+def is_multi(question: Mapping) -> bool:
+    return question.get("multi", False) or len(question.get("correct", [])) > 1
+
+
+class RenderedQuestion:
+    """A question's text and keyboards, built once per bank load.
+
+    The text only lacks the "question i/N" counter, which is filled in per
+    send. Keyboards are memoized by the bitmask of selected options, so a
+    multi-answer question builds each toggle state at most once.
+    """
+
+    def __init__(self, question: Mapping, build_keyboard: KeyboardBuilder) -> None:
+        self.question = question
+        self.option_keys = tuple(sorted(question.get("options", {})))
+        self.is_multi = is_multi(question)
+        self._build_keyboard = build_keyboard
+        self._keyboards: dict[int, InlineKeyboardMarkup] = {0: build_keyboard(question, set())}
+
+        title = question.get("title", "")
+        options = question.get("options", {})
+        lines = [f" • Деңгей: {question.get('level', '')}", "", question.get("question", ""), ""]
+        lines.extend(f"{key}) {options[key]}" for key in self.option_keys)
+        if self.is_multi:
+            lines.extend(["", "Бірнеше дұрыс жауап болуы мүмкін."])
+        self._head = f"<b>{title}</b>\nСұрақ " if title else "Сұрақ "
+        self._tail = "\n".join(lines)
+
+    def text(self, index: int, total: int) -> str:
+        return f"{self._head}{index + 1}/{total}{self._tail}"
+
+    def keyboard(self, selected: Optional[set] = None) -> InlineKeyboardMarkup:
+        if not selected or not self.is_multi:
+            return self._keyboards[0]
+        mask = 0
+        for bit, key in enumerate(self.option_keys):
+            if key in selected:
+                mask |= 1 << bit
+        keyboard = self._keyboards.get(mask)
+        if keyboard is None:
+            keyboard = self._keyboards[mask] = self._build_keyboard(self.question, set(selected))
+        return keyboard
+
+
+class QuestionRenderCache:
+    """Rendered questions of the current bank; rebuilt when the bank is reloaded."""
+
+    def __init__(self, build_keyboard: KeyboardBuilder) -> None:
+        self._build_keyboard = build_keyboard
+        self._bank: Optional[QuestionBank] = None
+        self._rendered: dict[str, RenderedQuestion] = {}
+
+    def get(self, bank: QuestionBank, question_id: str) -> Optional[RenderedQuestion]:
+        if bank is not self._bank:
+            self._rendered = {
+                question["id"]: RenderedQuestion(question, self._build_keyboard)
+                for question in bank.questions
+            }
+            self._bank = bank
+        return self._rendered.get(question_id)
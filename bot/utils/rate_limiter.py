@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+
+logger = logging.getLogger(__name__)
+
+# Telegram's documented flood limits: about 30 messages per second overall,
+# one per second in a private chat and 20 per minute in a group.
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+GROUP_RATE = 20 / 60
+GROUP_BURST = 3
+# A request is retried this many times after a 429 before the error is raised.
+MAX_RETRIES = 3
+# Idle per-chat buckets are forgotten once this many are being tracked.
+MAX_TRACKED_CHATS = 10_000
+
+ChatId = Union[int, str]
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of rejecting.
+
+    `reserve()` always takes a token, letting the balance go negative, and
+    returns how long the caller must wait for it. Callers therefore go out
+    in the order they reserved, at no more than `rate` per second after an
+    initial burst of `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Hold back the next reservation for at least `seconds`."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    def is_idle(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class OutboundRateLimiter(BaseRequestMiddleware):
+    """Bot session middleware that paces requests aimed at a chat.
+
+    Every method with a `chat_id` (sending, editing and deleting messages)
+    waits for a token from its chat's bucket and from the global bucket, so
+    a burst of quiz messages is spread out instead of hitting 429. When
+    Telegram still answers with retry_after, the chat is paused for that long
+    and the request is retried. Other calls (answerCallbackQuery, getUpdates)
+    pass straight through.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, global_burst: int = GLOBAL_BURST) -> None:
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats: dict[ChatId, TokenBucket] = {}
+        self._waiting = 0
+        self._requests = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._retry_after_hits = 0
+        self._retries_exhausted = 0
+
+    def _chat_bucket(self, chat_id: ChatId, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_TRACKED_CHATS:
+                self._forget_idle(now)
+            if isinstance(chat_id, int) and chat_id < 0:
+                bucket = TokenBucket(GROUP_RATE, GROUP_BURST, now)
+            else:
+                bucket = TokenBucket(CHAT_RATE, CHAT_BURST, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _forget_idle(self, now: float) -> None:
+        for chat_id in [key for key, bucket in self._chats.items() if bucket.is_idle(now)]:
+            del self._chats[chat_id]
+
+    async def _wait_turn(self, chat_id: ChatId) -> None:
+        now = time.monotonic()
+        delay = max(self._chat_bucket(chat_id, now).reserve(now), self._global.reserve(now))
+        self._requests += 1
+        if delay <= 0:
+            return
+        self._throttled += 1
+        self._waiting += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._waiting -= 1
+        self._wait_total += delay
+        self._wait_max = max(self._wait_max, delay)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        attempt = 0
+        while True:
+            await self._wait_turn(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                self._retry_after_hits += 1
+                now = time.monotonic()
+                self._chat_bucket(chat_id, now).pause(now, exc.retry_after)
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    self._retries_exhausted += 1
+                    raise
+                logger.warning(
+                    "%s to chat %s hit flood control; retrying in %ss",
+                    type(method).__name__,
+                    chat_id,
+                    exc.retry_after,
+                )
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self._requests,
+            "throttled": self._throttled,
+            "waiting": self._waiting,
+            "avg_wait_ms": (self._wait_total / self._throttled * 1000) if self._throttled else 0.0,
+            "max_wait_ms": self._wait_max * 1000,
+            "retry_after_hits": self._retry_after_hits,
+            "retries_exhausted": self._retries_exhausted,
+            "tracked_chats": len(self._chats),
+        }
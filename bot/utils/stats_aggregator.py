@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from typing import Optional
+
+from bot.utils.leaderboard_index import LeaderboardIndex
+from bot.utils.persistence import run_io
+from bot.utils.stats_store import (
+    QuizResult,
+    StatsStore,
+    apply_quiz_result,
+    get_stats_store,
+    merge_deltas,
+    result_delta,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pending results are written out every FLUSH_INTERVAL seconds, or earlier
+# once FLUSH_BATCH_SIZE users have some.
+FLUSH_INTERVAL = 5.0
+FLUSH_BATCH_SIZE = 200
+
+
+class StatsAggregator:
+    """Write-behind buffer in front of a StatsStore.
+
+    Quiz results are applied at once to an in-memory copy of the user's
+    stats, so `/stats` always shows the latest quiz, and kept as a pending
+    delta. A background task writes the deltas in batches, and once more on
+    `close()`, as increments, so other processes writing to the same store
+    are never overwritten. A user's copy is dropped once everything for them
+    is written, and the next read goes to the store again.
+    The leaderboard index is kept in step with every recorded quiz; when other
+    processes write to the same store, set `leaderboard_refresh_interval` to
+    also reload it from the store periodically.
+    """
+
+    def __init__(
+        self,
+        store: StatsStore,
+        flush_interval: float = FLUSH_INTERVAL,
+        flush_batch_size: int = FLUSH_BATCH_SIZE,
+    ) -> None:
+        self._store = store
+        self._flush_interval = flush_interval
+        self._flush_batch_size = flush_batch_size
+        # Stats of users with results that are not in the store yet.
+        self._cache: dict[str, dict] = {}
+        self._pending: dict[str, dict] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.leaderboard = LeaderboardIndex()
+        self.leaderboard_refresh_interval: Optional[float] = None
+
+    async def _load(self, user_id: str) -> Optional[dict]:
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            return cached
+        stored = await run_io(self._store.get, user_id)
+        # A quiz may have been recorded while we were waiting.
+        return self._cache.get(user_id, stored)
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        stats = await self._load(user_id)
+        return dict(stats) if stats is not None else None
+
+    async def load_leaderboard(self) -> None:
+        stats = await run_io(self._store.all)
+        stats.update(self._cache)
+        self.leaderboard.rebuild(stats.items())
+
+    async def record_quiz(self, user_id: str, result: QuizResult) -> dict:
+        current = await self._load(user_id)
+        # No await between reading and storing, so concurrent finishes for
+        # the same user are applied one after another.
+        updated = apply_quiz_result(self._cache.get(user_id, current), result)
+        self._cache[user_id] = updated
+        delta = result_delta(user_id, result)
+        pending = self._pending.get(user_id)
+        self._pending[user_id] = delta if pending is None else merge_deltas(pending, delta)
+        self.leaderboard.update(user_id, updated)
+        if len(self._pending) >= self._flush_batch_size:
+            self._wakeup.set()
+        return dict(updated)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            try:
+                await run_io(self._store.add_many, batch)
+            except BaseException:
+                # Results recorded meanwhile are newer than the batch.
+                for user_id, delta in batch.items():
+                    newer = self._pending.get(user_id)
+                    self._pending[user_id] = delta if newer is None else merge_deltas(delta, newer)
+                raise
+            for user_id in batch:
+                if user_id not in self._pending:
+                    del self._cache[user_id]
+            return len(batch)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        leaderboard_loaded_at = loop.time()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Stats flush failed; will retry")
+                continue
+            refresh = self.leaderboard_refresh_interval
+            if refresh and loop.time() - leaderboard_loaded_at >= refresh:
+                leaderboard_loaded_at = loop.time()
+                try:
+                    await self.load_leaderboard()
+                except Exception:
+                    logger.exception("Leaderboard reload failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+_aggregator: Optional[StatsAggregator] = None
+
+
+def get_stats_aggregator() -> StatsAggregator:
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = StatsAggregator(get_stats_store())
+    return _aggregator
@@ -0,0 +1,282 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Protocol
+
+from bot.utils.loader import STATS_DB_PATH, load_stats
+
+STATS_FIELDS = {
+    "quizzes_taken": 0,
+    "total_correct": 0,
+    "total_questions": 0,
+    "best_score": 0,
+    "best_total": 0,
+    "last_score": 0,
+    "last_total": 0,
+    "last_mode": "-",
+    "last_date": "-",
+    "total_points": 0,
+    "last_points": 0,
+    "best_points": 0,
+    "display_name": "",
+    "username": "",
+    "first_name": "",
+    "last_name": "",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    quizzes_taken INTEGER NOT NULL DEFAULT 0,
+    total_correct INTEGER NOT NULL DEFAULT 0,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    best_score INTEGER NOT NULL DEFAULT 0,
+    best_total INTEGER NOT NULL DEFAULT 0,
+    last_score INTEGER NOT NULL DEFAULT 0,
+    last_total INTEGER NOT NULL DEFAULT 0,
+    last_mode TEXT NOT NULL DEFAULT '-',
+    last_date TEXT NOT NULL DEFAULT '-',
+    total_points INTEGER NOT NULL DEFAULT 0,
+    last_points INTEGER NOT NULL DEFAULT 0,
+    best_points INTEGER NOT NULL DEFAULT 0,
+    display_name TEXT NOT NULL DEFAULT '',
+    username TEXT NOT NULL DEFAULT '',
+    first_name TEXT NOT NULL DEFAULT '',
+    last_name TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS user_stats_rank
+    ON user_stats (total_points DESC, total_correct DESC, quizzes_taken DESC);
+"""
+
+_COLUMNS = ", ".join(STATS_FIELDS)
+_PLACEHOLDERS = ", ".join(f":{name}" for name in STATS_FIELDS)
+
+# The best ratio is compared by cross-multiplying to stay in integers.
+_BETTER_RATIO = (
+    "excluded.best_total > 0 AND CASE WHEN best_total > 0 "
+    "THEN excluded.best_score * best_total > best_score * excluded.best_total "
+    "ELSE excluded.best_score > 0 END"
+)
+
+# A row holds the change made by one or more finished quizzes (see
+# `result_delta`). Increments are applied by SQLite against the stored row,
+# so writers finishing at the same time can never overwrite each other's
+# counters.
+_ADD_SQL = f"""
+INSERT INTO user_stats (user_id, {_COLUMNS})
+VALUES (:user_id, {_PLACEHOLDERS})
+ON CONFLICT(user_id) DO UPDATE SET
+    quizzes_taken = quizzes_taken + excluded.quizzes_taken,
+    total_correct = total_correct + excluded.total_correct,
+    total_questions = total_questions + excluded.total_questions,
+    best_score = CASE WHEN {_BETTER_RATIO} THEN excluded.best_score ELSE best_score END,
+    best_total = CASE WHEN {_BETTER_RATIO} THEN excluded.best_total ELSE best_total END,
+    last_score = excluded.last_score,
+    last_total = excluded.last_total,
+    last_mode = excluded.last_mode,
+    last_date = excluded.last_date,
+    total_points = total_points + excluded.total_points,
+    last_points = excluded.last_points,
+    best_points = MAX(best_points, excluded.best_points),
+    display_name = excluded.display_name,
+    username = excluded.username,
+    first_name = excluded.first_name,
+    last_name = excluded.last_name
+"""
+
+
+@dataclass(frozen=True)
+class QuizResult:
+    correct: int
+    total: int
+    mode: str
+    points: int
+    finished_at: str
+    display_name: str = ""
+    username: str = ""
+    first_name: str = ""
+    last_name: str = ""
+
+
+class StatsStore(Protocol):
+    def get(self, user_id: str) -> Optional[dict]: ...
+
+    def all(self) -> dict[str, dict]: ...
+
+    def add_many(self, deltas: dict[str, dict]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+def apply_quiz_result(stats: Optional[dict], result: QuizResult) -> dict:
+    """Return `stats` updated with one finished quiz, like `record_quiz` does in SQL."""
+    updated = dict(STATS_FIELDS)
+    if stats:
+        updated.update(stats)
+
+    updated["quizzes_taken"] += 1
+    updated["total_correct"] += result.correct
+    updated["total_questions"] += result.total
+    updated["last_score"] = result.correct
+    updated["last_total"] = result.total
+    updated["last_mode"] = result.mode
+    updated["last_date"] = result.finished_at
+    updated["total_points"] += result.points
+    updated["last_points"] = result.points
+    if result.points > updated["best_points"]:
+        updated["best_points"] = result.points
+
+    updated["display_name"] = result.display_name
+    updated["username"] = result.username
+    updated["first_name"] = result.first_name
+    updated["last_name"] = result.last_name
+
+    best_total = updated["best_total"]
+    best_ratio = (updated["best_score"] / best_total) if best_total else 0
+    current_ratio = (result.correct / result.total) if result.total else 0
+    if current_ratio > best_ratio:
+        updated["best_score"] = result.correct
+        updated["best_total"] = result.total
+    return updated
+
+
+def _better_ratio(score: int, total: int, best_score: int, best_total: int) -> bool:
+    if total <= 0:
+        return False
+    if best_total > 0:
+        return score * best_total > best_score * total
+    return score > 0
+
+
+def result_delta(user_id: str, result: QuizResult) -> dict:
+    """Row that adds one finished quiz to a user's stats via `add_many`."""
+    better = _better_ratio(result.correct, result.total, 0, 0)
+    return {
+        "user_id": user_id,
+        "quizzes_taken": 1,
+        "total_correct": result.correct,
+        "total_questions": result.total,
+        "best_score": result.correct if better else 0,
+        "best_total": result.total if better else 0,
+        "last_score": result.correct,
+        "last_total": result.total,
+        "last_mode": result.mode,
+        "last_date": result.finished_at,
+        "total_points": result.points,
+        "last_points": result.points,
+        "best_points": max(result.points, 0),
+        "display_name": result.display_name,
+        "username": result.username,
+        "first_name": result.first_name,
+        "last_name": result.last_name,
+    }
+
+
+def merge_deltas(older: dict, newer: dict) -> dict:
+    """One delta with the effect of applying `older`, then `newer`."""
+    merged = dict(newer)
+    for name in ("quizzes_taken", "total_correct", "total_questions", "total_points"):
+        merged[name] = older[name] + newer[name]
+    merged["best_points"] = max(older["best_points"], newer["best_points"])
+    if not _better_ratio(newer["best_score"], newer["best_total"], older["best_score"], older["best_total"]):
+        merged["best_score"] = older["best_score"]
+        merged["best_total"] = older["best_total"]
+    return merged
+
+
+def _stats_row(user_id: str, stats: dict) -> dict:
+    row = {"user_id": str(user_id)}
+    for name, default in STATS_FIELDS.items():
+        value = stats.get(name)
+        row[name] = default if value is None else value
+    return row
+
+
+class SqliteStatsStore:
+    """User stats in an SQLite database running in WAL mode.
+
+    One connection is shared between threads and guarded by a lock. Quiz
+    results are written as increments, so several processes can share the
+    file without overwriting each other's counters.
+    """
+
+    def __init__(self, path: Path = STATS_DB_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM user_stats WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return _row_to_stats(row) if row else None
+
+    def all(self) -> dict[str, dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM user_stats").fetchall()
+        return {row["user_id"]: _row_to_stats(row) for row in rows}
+
+    def add_many(self, deltas: dict[str, dict]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(_ADD_SQL, list(deltas.values()))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def import_stats(self, stats: Iterable[tuple[str, dict]]) -> int:
+        rows = [_stats_row(user_id, user_stats) for user_id, user_stats in stats]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    f"INSERT INTO user_stats (user_id, {_COLUMNS}) VALUES (:user_id, {_PLACEHOLDERS}) "
+                    "ON CONFLICT(user_id) DO NOTHING",
+                    rows,
+                )
+                imported = self._conn.total_changes - before
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _row_to_stats(row: sqlite3.Row) -> dict:
+    return {name: row[name] for name in STATS_FIELDS}
+
+
+def migrate_json_stats(store: SqliteStatsStore) -> int:
+    """Copy users from the legacy stats.json into the store.
+
+    Users that already exist in the store are left untouched, so running the
+    migration twice is harmless.
+    """
+    return store.import_stats(load_stats().items())
+
+
+_store: Optional[SqliteStatsStore] = None
+
+
+def get_stats_store() -> StatsStore:
+    global _store
+    if _store is None:
+        created = not STATS_DB_PATH.exists()
+        _store = SqliteStatsStore()
+        if created:
+            migrate_json_stats(_store)
+    return _store
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import signal
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from bot.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for updates that are still being handled on shutdown.
+DRAIN_TIMEOUT = 10.0
+READY_KEY = web.AppKey("ready", bool)
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+async def read_update(request: web.Request) -> Optional[dict]:
+    """The update posted by Telegram, or None if the body is not one."""
+    try:
+        update = await request.json()
+    except ValueError:
+        return None
+    if not isinstance(update, dict) or not isinstance(update.get("update_id"), int):
+        return None
+    return update
+
+
+def bad_request() -> web.Response:
+    # A 5xx would make Telegram retry a body that can never be handled.
+    return web.Response(status=400, text="Bad Request")
+
+
+class _WebhookHandler(SimpleRequestHandler):
+    async def handle(self, request: web.Request) -> web.Response:
+        authorised = self.verify_secret(request.headers.get(SECRET_HEADER, ""), self.bot)
+        if authorised and await read_update(request) is None:
+            return bad_request()
+        return await super().handle(request)
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        pending = set(self._background_feed_update_tasks)
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+
+
+async def _healthz(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+async def _readyz(request: web.Request) -> web.Response:
+    if request.app[READY_KEY]:
+        return web.Response(text="ready")
+    return web.Response(text="not ready", status=503)
+
+
+def add_health_routes(app: web.Application) -> None:
+    """Add /healthz and /readyz; the app reports ready once its startup ran."""
+    app[READY_KEY] = False
+    app.router.add_get("/healthz", _healthz)
+    app.router.add_get("/readyz", _readyz)
+
+    async def mark_ready(app: web.Application) -> None:
+        app[READY_KEY] = True
+
+    app.on_startup.append(mark_ready)
+
+
+async def set_webhook(bot: Bot, settings: Settings, allowed_updates: list[str]) -> None:
+    if settings.webhook_url:
+        await bot.set_webhook(
+            f"{settings.webhook_url}{settings.webhook_path}",
+            secret_token=settings.webhook_secret,
+            allowed_updates=allowed_updates,
+        )
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot, settings: Settings) -> tuple[web.Application, _WebhookHandler]:
+    app = web.Application()
+    handler = _WebhookHandler(dispatcher=dp, bot=bot, secret_token=settings.webhook_secret)
+    handler.register(app, path=settings.webhook_path)
+    setup_application(app, dp, bot=bot)
+
+    async def on_startup(app: web.Application) -> None:
+        await set_webhook(bot, settings, dp.resolve_used_update_types())
+
+    app.on_startup.append(on_startup)
+    add_health_routes(app)
+    return app, handler
+
+
+async def serve(
+    app: web.Application,
+    settings: Settings,
+    drain: Optional[Callable[[], Awaitable[None]]] = None,
+) -> None:
+    """Serve `app` until SIGINT/SIGTERM, then shut down gracefully."""
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+    await site.start()
+    logger.info(
+        "Webhook server listening on %s:%s%s",
+        settings.webhook_host,
+        settings.webhook_port,
+        settings.webhook_path,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        # Fail readiness first so a load balancer stops sending traffic,
+        # then let in-flight updates finish before shutting down.
+        app[READY_KEY] = False
+        await site.stop()
+        if drain is not None:
+            await drain()
+        await runner.cleanup()
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, settings: Settings) -> None:
+    app, handler = build_webhook_app(dp, bot, settings)
+    await serve(app, settings, handler.drain)
@@ -1,24 +1,25 @@
 import asyncio
-import os
+import logging
 
-from dotenv import load_dotenv
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
-
-from bot.handlers import router
+from bot.app import create_bot, create_dispatcher
+from bot.config import load_settings
+from bot.sharding import run_sharded
+from bot.webhook import run_webhook
 
 async def main():
-    load_dotenv()
-    token = os.getenv("BOT_TOKEN")
-    if not token:
-        raise RuntimeError("BOT_TOKEN not set in .env")
+    settings = load_settings()
+    logging.basicConfig(level=logging.INFO)
 
-    bot = Bot(token=token, default=DefaultBotProperties(parse_mode="HTML"))
-    dp = Dispatcher(storage=MemoryStorage())
-    dp.include_router(router)
+    if settings.workers > 1:
+        await run_sharded(settings)
+        return
 
-    await dp.start_polling(bot)
+    bot = create_bot(settings)
+    dp = create_dispatcher(settings)
+    if settings.bot_mode == "webhook":
+        await run_webhook(dp, bot, settings)
+    else:
+        await dp.start_polling(bot)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,45 @@
+"""
+Bot API session that answers every request locally, shared by the
+benchmarks in scripts/ and by the tests. Not meant to be run.
+"""
+
+import itertools
+
+from aiogram.client.session.base import BaseSession
+from aiogram.types import Chat, Message, PhotoSize
+
+
+class FakeSession(BaseSession):
+    """Answers Bot API calls with the smallest valid response.
+
+    Counts the calls and remembers the callback data of the buttons of each
+    chat's last message.
+    """
+
+    _message_ids = itertools.count(1)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.keyboards: dict[int, list[str]] = {}
+        self.calls = 0
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls += 1
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None and hasattr(method, "reply_markup"):
+            rows = getattr(method.reply_markup, "inline_keyboard", [])
+            self.keyboards[chat_id] = [button.callback_data for row in rows for button in row if button.callback_data]
+        if method.__returning__ is bool or chat_id is None:
+            return True
+        chat = Chat(id=chat_id, type="private")
+        message_id = getattr(method, "message_id", None) or next(self._message_ids)
+        if type(method).__name__ == "SendPhoto":
+            photo = [PhotoSize(file_id="fake", file_unique_id="fake", width=1, height=1)]
+            return Message(message_id=message_id, date=0, chat=chat, photo=photo, caption=method.caption)
+        return Message(message_id=message_id, date=0, chat=chat, text=getattr(method, "text", None))
+
+    async def close(self):
+        pass
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the shared keyboard registry.
+Compares building the menu keyboards from scratch (as every handler call
+used to) with fetching the shared instances: time and memory per call.
+Run: python3 scripts/bench_keyboards.py [--calls 20000]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bot.keyboards.content.compare import compare_numbers_keyboard  # noqa: E402
+from bot.keyboards.content.numbers import numbers_keyboard  # noqa: E402
+from bot.keyboards.quiz.compare import compare_mode_keyboard  # noqa: E402
+from bot.keyboards.quiz.quiz import mode_keyboard  # noqa: E402
+from bot.keyboards.system.menu import back_menu_keyboard, main_menu_keyboard  # noqa: E402
+from bot.utils.compare_index import COMPARE_NUMBERS  # noqa: E402
+
+NUMBERS = ["1", "3", "5", "7", "9", "12", "40"]
+
+KEYBOARDS = [
+    ("main_menu_keyboard", main_menu_keyboard, ()),
+    ("back_menu_keyboard", back_menu_keyboard, ()),
+    ("mode_keyboard", mode_keyboard, ()),
+    ("compare_mode_keyboard", compare_mode_keyboard, ()),
+    ("numbers_keyboard", numbers_keyboard, (NUMBERS,)),
+    ("compare_numbers_keyboard", compare_numbers_keyboard, (list(COMPARE_NUMBERS),)),
+]
+
+
+def _measure(func, args, calls: int) -> tuple[float, float]:
+    """Microseconds per call and bytes still allocated per call while all results are alive."""
+    started = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    elapsed = time.perf_counter() - started
+
+    sample = min(calls, 2000)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results = [func(*args) for _ in range(sample)]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del results
+    return elapsed / calls * 1e6, allocated / sample
+
+
+def main(calls: int) -> None:
+    print(f"{'keyboard':<26}{'fresh µs':>10}{'shared µs':>11}{'fresh B':>10}{'shared B':>10}")
+    for name, shared, args in KEYBOARDS:
+        fresh = shared.__wrapped__
+        fresh_time, fresh_bytes = _measure(fresh, args, calls)
+        shared_time, shared_bytes = _measure(shared, args, calls)
+        print(f"{name:<26}{fresh_time:>10.2f}{shared_time:>11.2f}{fresh_bytes:>10.0f}{shared_bytes:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark shared vs freshly built keyboards.")
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.calls)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Offline replay benchmark for the dispatcher.
+Feeds synthetic user sessions — or recorded updates — through the real
+handlers with a stubbed Bot session: /start, the info browse flow, compare
+culture switching, full quizzes in every mode, stats and leaderboard.
+Reports updates/sec, p50/p99 latency per handler and allocations per update.
+Runtime files (stats, file ids) go to a temporary directory.
+Run: python3 scripts/bench_replay.py [--users 20] [--updates scripts/updates/sample.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("RUNTIME_DIR", tempfile.mkdtemp(prefix="kielisan-bench-"))
+
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+
+from bot.app import create_bot, create_dispatcher  # noqa: E402
+from bot.config import Settings  # noqa: E402
+from bot.constants import (  # noqa: E402
+    MENU_COMPARE,
+    MENU_INFO,
+    MENU_LEADERBOARD,
+    MENU_QUIZ,
+    MENU_STATS,
+    MODE_LABELS,
+)
+from bot.keyboards.callback_data import COMPARE_QUIZ_OPS, QUIZ_OPS, Op, pack, unpack  # noqa: E402
+from bot.utils.compare_index import COMPARE_NUMBERS, CULTURE_CODE_TO_PLAIN  # noqa: E402
+from bot.utils.loader import load_sacred_numbers  # noqa: E402
+from bot.utils.metrics import current_handler  # noqa: E402
+from scripts._fake_session import FakeSession  # noqa: E402
+
+FIRST_USER_ID = 500_000
+# Safety net for a quiz that never finishes.
+MAX_QUIZ_STEPS = 200
+
+
+class Replay:
+    """Feeds updates one at a time and records latency and allocations."""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, session: FakeSession) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.session = session
+        self.reset()
+        self._update_ids = itertools.count(1)
+        self._handler = None
+
+        @dp.update.outer_middleware()
+        async def remember_handler(handler, event, data):
+            try:
+                return await handler(event, data)
+            finally:
+                self._handler = current_handler()
+
+    def reset(self, trace: bool = False) -> None:
+        self.trace = trace
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.allocated: list[int] = []
+        self.session.calls = 0
+
+    async def feed(self, update: dict) -> None:
+        update = Update.model_validate(update, context={"bot": self.bot})
+        if self.trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        await self.dp.feed_update(self.bot, update)
+        elapsed = time.perf_counter() - started
+        if self.trace:
+            self.allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        self.latency[self._handler or "unhandled"].append(elapsed)
+
+    async def text(self, user_id: int, text: str) -> None:
+        update_id = next(self._update_ids)
+        await self.feed({
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "from": _user(user_id),
+                "text": text,
+            },
+        })
+
+    async def click(self, user_id: int, data: str) -> None:
+        update_id = next(self._update_ids)
+        await self.feed({
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": _user(user_id),
+                "chat_instance": "bench",
+                "message": {"message_id": 1, "date": 0, "chat": {"id": user_id, "type": "private"}, "text": "q"},
+                "data": data,
+            },
+        })
+
+    def _buttons(self, user_id: int, ops: set) -> list[str]:
+        return [data for data in self.session.keyboards.get(user_id, []) if unpack(data).op in ops]
+
+    async def play_quiz(self, user_id: int, rng: random.Random, start: str, ops) -> None:
+        await self.click(user_id, start)
+        for _ in range(MAX_QUIZ_STEPS):
+            answers = self._buttons(user_id, {ops.answer})
+            toggles = self._buttons(user_id, {ops.toggle})
+            if answers:
+                await self.click(user_id, rng.choice(answers))
+            elif toggles:
+                await self.click(user_id, rng.choice(toggles))
+                await self.click(user_id, self._buttons(user_id, {ops.submit})[0])
+            else:
+                return
+
+    async def session_for(self, user_id: int, rng: random.Random) -> None:
+        numbers = list(load_sacred_numbers())
+        await self.text(user_id, "/start")
+
+        await self.text(user_id, MENU_INFO)
+        for number in rng.sample(numbers, min(3, len(numbers))):
+            await self.click(user_id, pack(Op.NUM_SHOW, number))
+            await self.click(user_id, pack(Op.NUM_TOGGLE, number, "short"))
+        await self.click(user_id, pack(Op.NUM_NEXT))
+        await self.click(user_id, pack(Op.NUM_LIST))
+
+        await self.text(user_id, MENU_COMPARE)
+        number = rng.choice(COMPARE_NUMBERS)
+        await self.click(user_id, pack(Op.CMP_NUMBER, number))
+        for code in CULTURE_CODE_TO_PLAIN:
+            await self.click(user_id, pack(Op.CMP_CULTURE, number, code))
+        await self.click(user_id, pack(Op.CMP_VIEW, number, "compare"))
+        await self.click(user_id, pack(Op.CMP_VIEW, number, "full"))
+
+        for mode in MODE_LABELS:
+            await self.text(user_id, MENU_QUIZ)
+            await self.play_quiz(user_id, rng, pack(Op.QUIZ_MODE, mode), QUIZ_OPS)
+        await self.click(user_id, pack(Op.CMP_QUIZ))
+        await self.play_quiz(user_id, rng, pack(Op.CMP_QUIZ_MODE, "mixed"), COMPARE_QUIZ_OPS)
+
+        await self.text(user_id, MENU_STATS)
+        await self.text(user_id, MENU_LEADERBOARD)
+        await self.click(user_id, pack(Op.MENU))
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _play(replay: Replay, args, users: range) -> None:
+    if args.updates:
+        recorded = json.loads(Path(args.updates).read_text(encoding="utf-8"))
+        for update in recorded if isinstance(recorded, list) else [recorded]:
+            await replay.feed(update)
+    else:
+        for user_id in users:
+            await replay.session_for(user_id, random.Random(user_id))
+
+
+def _report(replay: Replay, elapsed: float) -> None:
+    samples = [value for values in replay.latency.values() for value in values]
+    print(f"runtime dir: {os.environ['RUNTIME_DIR']}")
+    print(f"{len(samples)} updates in {elapsed:.2f}s: {len(samples) / elapsed:.0f} updates/s, "
+          f"{replay.session.calls} API calls")
+    print(f"\n{'handler':<22}{'calls':>7}{'p50 ms':>9}{'p99 ms':>9}")
+    for name, values in sorted(replay.latency.items(), key=lambda item: -len(item[1])):
+        print(f"{name:<22}{len(values):>7}{_percentile(values, 0.5) * 1000:>9.2f}{_percentile(values, 0.99) * 1000:>9.2f}")
+    print(f"{'all':<22}{len(samples):>7}{_percentile(samples, 0.5) * 1000:>9.2f}{_percentile(samples, 0.99) * 1000:>9.2f}")
+
+
+async def main(args) -> None:
+    session = FakeSession()
+    settings = Settings(bot_token="42:BENCH", rate_limit=False, quiz_compact=args.compact)
+    bot = create_bot(settings, session)
+    dp = create_dispatcher(settings)
+    replay = Replay(dp, bot, session)
+    await dp.emit_startup(bot=bot, bots=[bot], dispatcher=dp, **dp.workflow_data)
+    try:
+        # Warm-up pass: content snapshots, render caches and keyboards.
+        await _play(replay, args, range(FIRST_USER_ID, FIRST_USER_ID + 1))
+
+        replay.reset()
+        users = range(FIRST_USER_ID + 1, FIRST_USER_ID + 1 + args.users)
+        started = time.perf_counter()
+        await _play(replay, args, users)
+        _report(replay, time.perf_counter() - started)
+
+        replay.reset(trace=True)
+        tracemalloc.start()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        await _play(replay, args, range(users.stop, users.stop + args.users))
+        retained = tracemalloc.get_traced_memory()[0] - start_memory
+        tracemalloc.stop()
+        print(
+            f"\nallocations per update: mean {statistics.mean(replay.allocated) / 1024:.1f} KiB, "
+            f"p99 {_percentile(replay.allocated, 0.99) / 1024:.1f} KiB; "
+            f"retained after the run {retained / 1024:.0f} KiB"
+        )
+    finally:
+        await dp.emit_shutdown(bot=bot, bots=[bot], dispatcher=dp, **dp.workflow_data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay user sessions through the dispatcher offline.")
+    parser.add_argument("--users", type=int, default=20, help="synthetic users, one full session each")
+    parser.add_argument("--updates", help="JSON file with recorded updates to replay instead")
+    parser.add_argument("--compact", action="store_true", help="run quizzes in compact mode")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for callback dispatch.
+Feeds the same callback updates through two dispatchers with no-op handlers:
+the callback table and the router chain it replaced, where every handler had
+its own `F.data` filter in one of eight routers. Reports microseconds per
+update.
+Run: python3 scripts/bench_routing.py [--updates 5000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from aiogram import Bot, Dispatcher, F, Router  # noqa: E402
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+from aiogram.types import CallbackQuery, Chat, Message, Update, User  # noqa: E402
+
+from bot.handlers.callbacks import CallbackTable, callbacks  # noqa: E402
+from bot.keyboards.callback_data import Op, pack  # noqa: E402
+from bot.states.quiz import QuizStates  # noqa: E402
+
+USER_ID = 1
+OLD_ROUTERS = ("start", "info", "compare", "quiz", "stats", "leaderboard", "feedback", "menu")
+# The string prefix each opcode had and the router it lived in, in handler order.
+# A trailing ":" marks a prefix match, anything else was an exact match.
+OLD_ROUTES = [
+    ("info", "num:random", Op.NUM_RANDOM),
+    ("info", "num:list", Op.NUM_LIST),
+    ("info", "num:next", Op.NUM_NEXT),
+    ("info", "num:toggle:", Op.NUM_TOGGLE),
+    ("info", "num:help:", Op.NUM_HELP),
+    ("info", "num:", Op.NUM_SHOW),
+    ("compare", "cmp:list", Op.CMP_LIST),
+    ("compare", "cmp:num:", Op.CMP_NUMBER),
+    ("compare", "cmp:view:", Op.CMP_VIEW),
+    ("compare", "cmp:cul:", Op.CMP_CULTURE),
+    ("compare", "cmp:quiz", Op.CMP_QUIZ),
+    ("compare", "cmpmode:", Op.CMP_QUIZ_MODE),
+    ("compare", "cmp:ans:", Op.CMP_QUIZ_ANSWER),
+    ("compare", "cmp:toggle:", Op.CMP_QUIZ_TOGGLE),
+    ("compare", "cmp:submit:", Op.CMP_QUIZ_SUBMIT),
+    ("quiz", "mode:", Op.QUIZ_MODE),
+    ("quiz", "ans:", Op.QUIZ_ANSWER),
+    ("quiz", "toggle:", Op.QUIZ_TOGGLE),
+    ("quiz", "submit:", Op.QUIZ_SUBMIT),
+    ("menu", "menu", Op.MENU),
+]
+
+# (old callback data, packed callback data)
+CALLBACKS = [
+    ("menu", pack(Op.MENU)),
+    ("num:7", pack(Op.NUM_SHOW, "7")),
+    ("num:toggle:7:short", pack(Op.NUM_TOGGLE, "7", "short")),
+    ("cmp:cul:7:kazakh", pack(Op.CMP_CULTURE, "7", "kazakh")),
+    ("mode:easy", pack(Op.QUIZ_MODE, "easy")),
+    ("ans:q01:A", pack(Op.QUIZ_ANSWER, "q01", "A")),
+    ("submit:q01", pack(Op.QUIZ_SUBMIT, "q01")),
+    ("cmp:submit:c01", pack(Op.CMP_QUIZ_SUBMIT, "c01")),
+]
+
+
+async def _noop(*args, **kwargs) -> None:
+    return None
+
+
+def _table_router() -> Router:
+    table = CallbackTable()
+    for route in callbacks:
+        otherwise = _noop if route.otherwise is not None else None
+        table.add(route.op, _noop, state=route.state, otherwise=otherwise)
+    root = Router()
+    table.register(root)
+    for _ in OLD_ROUTERS:
+        root.include_router(Router())
+    return root
+
+
+def _chain_router() -> Router:
+    routes = {route.op: route for route in callbacks}
+    routers = {name: Router() for name in OLD_ROUTERS}
+    for name, key, op in OLD_ROUTES:
+        router, route = routers[name], routes[op]
+        matches = F.data.startswith(key) if key.endswith(":") else F.data == key
+        if route.state is not None:
+            router.callback_query.register(_noop, route.state, matches)
+            router.callback_query.register(_noop, matches)
+        else:
+            router.callback_query.register(_noop, matches)
+    root = Router()
+    for router in routers.values():
+        root.include_router(router)
+    return root
+
+
+async def _dispatcher(router: Router) -> Dispatcher:
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(router)
+    key = StorageKey(bot_id=42, chat_id=USER_ID, user_id=USER_ID)
+    await dp.storage.set_state(key, QuizStates.in_quiz)
+    return dp
+
+
+def _user() -> User:
+    return User(id=USER_ID, is_bot=False, first_name="User")
+
+
+def _chat() -> Chat:
+    return Chat(id=USER_ID, type="private")
+
+
+def _callback_update(data: str) -> Update:
+    message = Message(message_id=1, date=0, chat=_chat(), text="q")
+    query = CallbackQuery(id="1", from_user=_user(), chat_instance="c", message=message, data=data)
+    return Update(update_id=1, callback_query=query)
+
+
+async def _measure(dp: Dispatcher, bot: Bot, update: Update, count: int) -> float:
+    for _ in range(min(count, 200)):
+        await dp.feed_update(bot, update)
+    started = time.perf_counter()
+    for _ in range(count):
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+async def main(count: int) -> None:
+    bot = Bot(token="42:BENCH")
+    chain = await _dispatcher(_chain_router())
+    table = await _dispatcher(_table_router())
+
+    print(f"{'update':<22}{'packed':<10}{'chain µs':>10}{'table µs':>10}")
+    chain_total = table_total = 0.0
+    for old, packed in CALLBACKS:
+        chain_time = await _measure(chain, bot, _callback_update(old), count)
+        table_time = await _measure(table, bot, _callback_update(packed), count)
+        chain_total += chain_time
+        table_total += table_time
+        print(f"{old:<22}{packed:<10}{chain_time:>10.1f}{table_time:>10.1f}")
+    print(f"{'mean':<32}{chain_total / len(CALLBACKS):>10.1f}{table_total / len(CALLBACKS):>10.1f}")
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the callback table against the router chain.")
+    parser.add_argument("--updates", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.updates))
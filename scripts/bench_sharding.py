@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Synthetic throughput benchmark for sharded update processing.
+Generates menu/compare/quiz-start updates for many users, feeds them through
+ShardSupervisor with 1..N worker processes and reports updates per second.
+Telegram is replaced by an in-process session that answers every request.
+Runtime files (stats, FSM database) go to a temporary directory.
+Run: python3 scripts/bench_sharding.py [--workers 1,2,4] [--users 200] [--rounds 10]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# Set before bot modules are imported; spawned workers inherit it.
+if "RUNTIME_DIR" not in os.environ:
+    _runtime_dir = tempfile.TemporaryDirectory(prefix="kielisan-shards-")
+    os.environ["RUNTIME_DIR"] = _runtime_dir.name
+
+from bot.config import Settings  # noqa: E402
+from bot.constants import MENU_COMPARE, MENU_HELP, MENU_LEADERBOARD, MENU_QUIZ  # noqa: E402
+from bot.keyboards.callback_data import Op, pack  # noqa: E402
+from bot.sharding import ShardSupervisor  # noqa: E402
+from scripts._fake_session import FakeSession  # noqa: E402
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+
+def _message(update_id: int, user_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": _user(user_id),
+            "text": text,
+        },
+    }
+
+
+def _callback(update_id: int, user_id: int, data: str) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": _user(user_id),
+            "chat_instance": "bench",
+            "data": data,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "text": "bench",
+            },
+        },
+    }
+
+
+def generate_updates(users: int, rounds: int) -> list[dict]:
+    """One session per user and round, interleaved across users."""
+    script = [
+        (_message, "/start"),
+        (_message, MENU_COMPARE),
+        (_callback, pack(Op.CMP_NUMBER, "7")),
+        (_callback, pack(Op.CMP_CULTURE, "7", "kazakh")),
+        (_message, MENU_QUIZ),
+        (_callback, pack(Op.QUIZ_MODE, "mixed")),
+        (_message, MENU_HELP),
+        (_message, MENU_LEADERBOARD),
+    ]
+    update_ids = itertools.count(1)
+    updates = []
+    for _ in range(rounds):
+        for make, payload in script:
+            for user_id in range(1, users + 1):
+                updates.append(make(next(update_ids), 10_000 + user_id, payload))
+    return updates
+
+
+async def run_once(workers: int, updates: list[dict]) -> float:
+    settings = Settings(bot_token="42:BENCH", workers=workers, rate_limit=False)
+    supervisor = ShardSupervisor(settings, workers, session_factory=FakeSession)
+    await supervisor.start()
+    started = time.perf_counter()
+    for update in updates:
+        await supervisor.dispatch(update)
+    await supervisor.close()
+    return time.perf_counter() - started
+
+
+async def main(worker_counts: list[int], users: int, rounds: int) -> None:
+    updates = generate_updates(users, rounds)
+    print(f"{len(updates)} updates from {users} users")
+    baseline = None
+    for workers in worker_counts:
+        elapsed = await run_once(workers, updates)
+        rate = len(updates) / elapsed
+        baseline = baseline or rate
+        print(f"workers={workers:<3} {elapsed:7.2f}s  {rate:9.0f} updates/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded update processing.")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    counts = [int(value) for value in args.workers.split(",") if value.strip()]
+    asyncio.run(main(counts, args.users, args.rounds))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Offline build step for number card images.
+Resizes and re-encodes every assets/numbers/num_*.* source image into a
+size-optimised variant and writes assets/numbers/manifest.json, which the bot
+reads instead of probing files at runtime.
+Requires Pillow (see requirements-dev.txt).
+Run: python3 scripts/build_assets.py [--max-side 1280] [--max-bytes 200000] [--format jpeg]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import re
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from bot.utils.loader import ASSET_MANIFEST_PATH, NUMBER_ASSETS_DIR  # noqa: E402
+
+OUTPUT_DIR = NUMBER_ASSETS_DIR / "optimized"
+SOURCE_PATTERN = re.compile(r"^num_(\d+)\.(png|jpe?g|webp)$", re.IGNORECASE)
+FORMAT_EXT = {"jpeg": ".jpg", "webp": ".webp"}
+QUALITY_STEPS = (88, 82, 76, 70, 64, 58, 52, 46, 40)
+
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, "WEBP", quality=quality, method=6)
+    return buffer.getvalue()
+
+
+def _optimise(source: Path, fmt: str, max_side: int, max_bytes: int) -> tuple[bytes, tuple[int, int], int]:
+    with Image.open(source) as original:
+        image = original.convert("RGB")
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    while True:
+        for quality in QUALITY_STEPS:
+            payload = _encode(image, fmt, quality)
+            if len(payload) <= max_bytes:
+                return payload, image.size, quality
+        # Even the lowest quality is over budget: shrink and try again.
+        width, height = image.size
+        if max(width, height) <= 320:
+            return payload, image.size, quality
+        image = image.resize((int(width * 0.85), int(height * 0.85)), Image.LANCZOS)
+
+
+def build(fmt: str, max_side: int, max_bytes: int) -> dict:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    manifest: dict[str, dict] = {}
+    written: set[Path] = set()
+
+    for source in sorted(NUMBER_ASSETS_DIR.iterdir()):
+        match = SOURCE_PATTERN.match(source.name)
+        if not match:
+            continue
+        number = match.group(1)
+        if number in manifest:
+            print(f"skip {source.name}: num_{number} already built from {manifest[number]['source']}")
+            continue
+
+        payload, (width, height), quality = _optimise(source, fmt, max_side, max_bytes)
+        digest = hashlib.sha256(payload).hexdigest()
+        target = OUTPUT_DIR / f"num_{number}.{digest[:10]}{FORMAT_EXT[fmt]}"
+        target.write_bytes(payload)
+        written.add(target)
+
+        manifest[number] = {
+            "path": target.relative_to(NUMBER_ASSETS_DIR).as_posix(),
+            "source": source.name,
+            "bytes": len(payload),
+            "width": width,
+            "height": height,
+            "sha256": digest,
+        }
+        print(
+            f"{source.name}: {source.stat().st_size} -> {len(payload)} bytes "
+            f"({width}x{height}, q={quality})"
+        )
+
+    for stale in OUTPUT_DIR.iterdir():
+        if stale.is_file() and stale not in written:
+            stale.unlink()
+
+    ordered = dict(sorted(manifest.items(), key=lambda item: int(item[0])))
+    ASSET_MANIFEST_PATH.write_text(
+        json.dumps(ordered, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+    return ordered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build optimised number card images.")
+    parser.add_argument("--format", choices=sorted(FORMAT_EXT), default="jpeg")
+    parser.add_argument("--max-side", type=int, default=1280)
+    parser.add_argument("--max-bytes", type=int, default=200_000)
+    args = parser.parse_args()
+
+    manifest = build(args.format, args.max_side, args.max_bytes)
+    total = sum(entry["bytes"] for entry in manifest.values())
+    print(f"Wrote {len(manifest)} images ({total} bytes) and {ASSET_MANIFEST_PATH.name}")
+
+
+if __name__ == "__main__":
+    main()
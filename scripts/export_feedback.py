@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Export the feedback journal (data/runtime/feedback.jsonl plus rotated files)
+as a single JSON array, the format data/runtime/feedback.json used to have.
+Run: python3 scripts/export_feedback.py [--output path]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bot.utils.feedback_log import feedback_journal  # noqa: E402
+from bot.utils.loader import FEEDBACK_PATH  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export feedback as a JSON array.")
+    parser.add_argument("--output", type=Path, default=FEEDBACK_PATH)
+    args = parser.parse_args()
+
+    count = feedback_journal.export(args.output)
+    print(f"Exported {count} feedback entries to {args.output}")
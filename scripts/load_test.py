@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Load test: N virtual users take quizzes at the same time.
+The bot polls a local fake Bot API server over HTTP, exactly as it would poll
+Telegram. Each user opens the quiz menu, picks a random mode, answers single
+choice questions, toggles options of multi-answer ones and submits, reading
+the buttons from what the bot sent. Reports end-to-end latency per step,
+stats updates lost or duplicated on the way to the stats database, and the
+live FSM sessions (count and bytes) and process memory while the users play.
+Runtime files (stats, FSM database) go to a new temporary directory on every
+run, so the stats database starts empty.
+Run: python3 scripts/load_test.py [--users 1000] [--quizzes 2] [--fsm memory|sqlite]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# Always a new directory: lost/duplicated stats are counted against an empty store.
+os.environ["RUNTIME_DIR"] = tempfile.mkdtemp(prefix="kielisan-load-")
+
+from aiohttp import web  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from aiogram.fsm.storage.base import BaseStorage  # noqa: E402
+
+from bot.app import create_bot, create_dispatcher  # noqa: E402
+from bot.config import Settings  # noqa: E402
+from bot.constants import MENU_QUIZ, SESSION_EXPIRED_TEXT  # noqa: E402
+from bot.keyboards.callback_data import QUIZ_OPS, unpack  # noqa: E402
+from bot.utils.loader import FSM_DB_PATH  # noqa: E402
+from bot.utils.stats_store import get_stats_store  # noqa: E402
+
+FIRST_USER_ID = 700_000
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "KieliSan", "username": "kielisan_load_bot"}
+SUMMARY = re.compile(r"Нәтиже: (\d+)/(\d+).*\nҰпай: (\d+)", re.S)
+# Safety net for a quiz that never finishes.
+MAX_QUIZ_STEPS = 200
+
+
+class FakeTelegram:
+    """Bot API server for the load test.
+
+    `getUpdates` long-polls a queue filled by the virtual users; every other
+    method is acknowledged and put on the outbox of the chat it targets.
+    """
+
+    def __init__(self) -> None:
+        self.updates: asyncio.Queue[dict] = asyncio.Queue()
+        self.outbox: dict[int, asyncio.Queue[dict]] = defaultdict(asyncio.Queue)
+        self.calls: Counter[str] = Counter()
+        self.pushed = 0
+        self.polling = asyncio.Event()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def push(self, update: dict) -> None:
+        update["update_id"] = next(self._update_ids)
+        self.pushed += 1
+        self.updates.put_nowait(update)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        self.calls[method] += 1
+        if method == "getUpdates":
+            result = await self._get_updates(params)
+        elif method == "getMe":
+            result = BOT_USER
+        else:
+            result = self._deliver(method, params)
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        self.polling.set()
+        limit = int(params.get("limit") or 100)
+        try:
+            first = await asyncio.wait_for(self.updates.get(), timeout=float(params.get("timeout") or 0))
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < limit and not self.updates.empty():
+            batch.append(self.updates.get_nowait())
+        return batch
+
+    def _deliver(self, method: str, params: dict):
+        if "chat_id" in params:
+            chat_id = int(params["chat_id"])
+        elif "callback_query_id" in params:
+            # Callback ids are "<user id>:<n>", see VirtualUser.click.
+            chat_id = int(params["callback_query_id"].split(":")[0])
+        else:
+            return True
+        message_id = int(params.get("message_id") or next(self._message_ids))
+        markup = json.loads(params["reply_markup"]) if params.get("reply_markup") else {}
+        self.outbox[chat_id].put_nowait({
+            "method": method,
+            "message_id": message_id,
+            "text": params.get("text", ""),
+            "markup": markup,
+            "at": time.perf_counter(),
+        })
+        if method == "answerCallbackQuery" or "chat_id" not in params:
+            return True
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text", ""),
+        }
+
+
+def _buttons(event: dict, op) -> list[str]:
+    rows = event["markup"].get("inline_keyboard", [])
+    return [
+        button["callback_data"]
+        for row in rows
+        for button in row
+        if "callback_data" in button and unpack(button["callback_data"]).op == op
+    ]
+
+
+def _question_id(event: dict) -> Optional[str]:
+    for op in (QUIZ_OPS.answer, QUIZ_OPS.toggle):
+        buttons = _buttons(event, op)
+        if buttons:
+            return unpack(buttons[0]).payload.question_id
+    return None
+
+
+class VirtualUser:
+    """One quiz-taker: sends an update, then waits for the reply it expects."""
+
+    def __init__(self, user_id: int, api: FakeTelegram, args) -> None:
+        self.user_id = user_id
+        self.api = api
+        self.args = args
+        self.rng = random.Random(user_id)
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.expected = Counter()
+        self.expired = 0
+        self.timeouts = 0
+        self._callback_ids = itertools.count(1)
+
+    def _profile(self) -> dict:
+        return {"id": self.user_id, "is_bot": False, "first_name": f"User{self.user_id}",
+                "username": f"user{self.user_id}"}
+
+    def _chat(self) -> dict:
+        return {"id": self.user_id, "type": "private"}
+
+    async def _expect(self, step: str, sent_at: float, matches: Callable[[dict], bool]) -> dict:
+        outbox = self.api.outbox[self.user_id]
+        deadline = time.monotonic() + self.args.timeout
+        while True:
+            event = await asyncio.wait_for(outbox.get(), timeout=max(0.0, deadline - time.monotonic()))
+            if event["method"] == "answerCallbackQuery" and event["text"] == SESSION_EXPIRED_TEXT:
+                self.expired += 1
+            if matches(event):
+                self.latency[step].append(event["at"] - sent_at)
+                return event
+
+    def _discard_stale(self) -> None:
+        outbox = self.api.outbox[self.user_id]
+        while not outbox.empty():
+            outbox.get_nowait()
+
+    async def text(self, step: str, text: str, matches: Callable[[dict], bool]) -> dict:
+        self._discard_stale()
+        sent_at = time.perf_counter()
+        self.api.push({"message": {
+            "message_id": 1,
+            "date": int(time.time()),
+            "chat": self._chat(),
+            "from": self._profile(),
+            "text": text,
+        }})
+        return await self._expect(step, sent_at, matches)
+
+    async def click(self, step: str, message: dict, data: str, matches: Callable[[dict], bool]) -> dict:
+        self._discard_stale()
+        # A second tap on a toggle would undo the first, so only answers
+        # and submits are repeated.
+        repeatable = step in ("answer", "submit")
+        taps = 2 if repeatable and self.rng.random() < self.args.double_tap else 1
+        sent_at = time.perf_counter()
+        for _ in range(taps):
+            self.api.push({"callback_query": {
+                "id": f"{self.user_id}:{next(self._callback_ids)}",
+                "from": self._profile(),
+                "chat_instance": "load",
+                "message": {"message_id": message["message_id"], "date": int(time.time()),
+                            "chat": self._chat(), "text": message["text"]},
+                "data": data,
+            }})
+        return await self._expect(step, sent_at, matches)
+
+    async def think(self) -> None:
+        if self.args.think:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think))
+
+    async def take_quiz(self) -> None:
+        menu = await self.text("menu", MENU_QUIZ, lambda event: bool(_buttons(event, QUIZ_OPS.mode)))
+        await self.think()
+        modes = _buttons(menu, QUIZ_OPS.mode)
+        event = await self.click("mode", menu, self.rng.choice(modes), lambda event: _question_id(event) is not None)
+
+        for _ in range(MAX_QUIZ_STEPS):
+            question_id = _question_id(event)
+
+            def answered(reply: dict) -> bool:
+                if SUMMARY.search(reply["text"]):
+                    return True
+                next_id = _question_id(reply)
+                return next_id is not None and next_id != question_id
+
+            await self.think()
+            answers = _buttons(event, QUIZ_OPS.answer)
+            if answers:
+                event = await self.click("answer", event, self.rng.choice(answers), answered)
+            else:
+                toggles = _buttons(event, QUIZ_OPS.toggle)
+                for data in self.rng.sample(toggles, self.rng.randint(1, len(toggles))):
+                    event = await self.click(
+                        "toggle", event, data,
+                        lambda reply: reply["method"] == "editMessageReplyMarkup",
+                    )
+                submit = _buttons(event, QUIZ_OPS.submit)[0]
+                event = await self.click("submit", event, submit, answered)
+
+            summary = SUMMARY.search(event["text"])
+            if summary:
+                correct, total, points = map(int, summary.groups())
+                self.expected["quizzes_taken"] += 1
+                self.expected["total_correct"] += correct
+                self.expected["total_questions"] += total
+                self.expected["total_points"] += points
+                return
+
+    async def run(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        for _ in range(self.args.quizzes):
+            try:
+                await self.take_quiz()
+            except asyncio.TimeoutError:
+                # The bot never sent the expected reply (e.g. a double tap
+                # was applied twice); the next quiz starts from the menu.
+                self.timeouts += 1
+
+
+def _rss_kib() -> int:
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _deep_size(root) -> int:
+    seen: set[int] = set()
+    stack = [root]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, asyncio.Task)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return size
+
+
+# Live rows and the bytes of their columns; the file size would include
+# free pages and the write-ahead log.
+_FSM_LIVE_SQL = """
+SELECT COUNT(*), COALESCE(SUM(
+    LENGTH(CAST(key AS BLOB)) + COALESCE(LENGTH(CAST(state AS BLOB)), 0)
+    + LENGTH(CAST(data AS BLOB)) + 8
+), 0) FROM fsm
+"""
+
+
+def _fsm_usage(storage: BaseStorage, backend: str) -> tuple[int, int]:
+    """Live FSM sessions and their size in bytes."""
+    if backend == "sqlite":
+        conn = sqlite3.connect(f"file:{FSM_DB_PATH}?mode=ro", uri=True)
+        try:
+            return conn.execute(_FSM_LIVE_SQL).fetchone()
+        finally:
+            conn.close()
+    sessions = storage.metrics().get("active_sessions", 0) if hasattr(storage, "metrics") else 0
+    return sessions, _deep_size(storage)
+
+
+async def _sample_memory(storage: BaseStorage, backend: str, samples: list, interval: float) -> None:
+    started = time.perf_counter()
+    while True:
+        sessions, fsm_bytes = _fsm_usage(storage, backend)
+        samples.append((time.perf_counter() - started, _rss_kib(), sessions, fsm_bytes))
+        await asyncio.sleep(interval)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _report(users: list[VirtualUser], api: FakeTelegram, elapsed: float, samples: list) -> None:
+    latency: dict[str, list[float]] = defaultdict(list)
+    for user in users:
+        for step, values in user.latency.items():
+            latency[step].extend(values)
+    steps = sum(len(values) for values in latency.values())
+    updates = api.pushed
+    print(f"runtime dir: {os.environ['RUNTIME_DIR']}")
+    print(f"{len(users)} users, {updates} updates in {elapsed:.2f}s: {updates / elapsed:.0f} updates/s, "
+          f"{sum(api.calls.values())} API calls")
+    print(f"\n{'step':<10}{'count':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for step in ("menu", "mode", "answer", "toggle", "submit"):
+        values = latency.get(step)
+        if values:
+            print(f"{step:<10}{len(values):>8}{_percentile(values, 0.5) * 1000:>9.1f}"
+                  f"{_percentile(values, 0.99) * 1000:>9.1f}{max(values) * 1000:>9.1f}")
+    if steps:
+        every = [value for values in latency.values() for value in values]
+        print(f"{'all':<10}{steps:>8}{_percentile(every, 0.5) * 1000:>9.1f}{_percentile(every, 0.99) * 1000:>9.1f}"
+              f"{max(every) * 1000:>9.1f}")
+
+    stored = get_stats_store().all()
+    lost = Counter()
+    extra = Counter()
+    for user in users:
+        stats = stored.get(str(user.user_id), {})
+        for field, expected in user.expected.items():
+            difference = expected - stats.get(field, 0)
+            if difference > 0:
+                lost[field] += difference
+            elif difference < 0:
+                extra[field] -= difference
+    finished = sum(user.expected["quizzes_taken"] for user in users)
+    print(f"\nquizzes finished {finished}, stored {sum(s['quizzes_taken'] for s in stored.values())}; "
+          f"lost {dict(lost) or 0}, duplicated {dict(extra) or 0}")
+    print(f"timed out quizzes {sum(user.timeouts for user in users)}, "
+          f"'quiz expired' alerts {sum(user.expired for user in users)}")
+
+    if samples:
+        _, start_rss, _, start_fsm = samples[0]
+        peak = max(samples, key=lambda sample: sample[1])
+        print(f"\n{'t s':>6}{'RSS MiB':>9}{'sessions':>10}{'FSM KiB':>9}")
+        step = max(1, len(samples) // 10)
+        for at, rss, sessions, fsm in samples[::step] + samples[-1:]:
+            print(f"{at:>6.1f}{rss / 1024:>9.1f}{sessions:>10}{fsm / 1024:>9.0f}")
+        end_rss, end_fsm = samples[-1][1], samples[-1][3]
+        print(f"RSS {start_rss / 1024:.1f} -> peak {peak[1] / 1024:.1f} -> end {end_rss / 1024:.1f} MiB; "
+              f"live FSM data grew by {(end_fsm - start_fsm) / 1024:.0f} KiB "
+              f"({(end_fsm - start_fsm) / max(1, len(users)):.0f} bytes per user)")
+
+
+async def main(args) -> None:
+    api = FakeTelegram()
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app, handle_signals=False, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    settings = Settings(
+        bot_token="42:LOAD",
+        rate_limit=args.rate_limit,
+        quiz_compact=args.compact,
+        fsm_storage=args.fsm,
+    )
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}"))
+    bot = create_bot(settings, session)
+    dp = create_dispatcher(settings)
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+    await api.polling.wait()
+
+    users = [VirtualUser(FIRST_USER_ID + index, api, args) for index in range(args.users)]
+    samples: list = []
+    sampler = asyncio.create_task(_sample_memory(dp.storage, args.fsm, samples, args.sample_interval))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        user.run(args.ramp_up * index / max(1, args.users)) for index, user in enumerate(users)
+    ))
+    elapsed = time.perf_counter() - started
+    # Let the bot go idle (the sweeper may still drop sessions), then take a last sample.
+    await asyncio.sleep(args.sample_interval)
+    sampler.cancel()
+
+    await dp.stop_polling()
+    # Shutdown flushes the stats aggregator, so the store has everything written.
+    await polling
+    _report(users, api, elapsed, samples)
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run concurrent virtual quiz-takers against a fake Bot API.")
+    parser.add_argument("--users", type=int, default=200, help="virtual users playing at the same time")
+    parser.add_argument("--quizzes", type=int, default=2, help="quizzes each user finishes")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="seconds over which users join")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause before each click, in seconds")
+    parser.add_argument("--double-tap", type=float, default=0.0,
+                        help="share of answer and submit clicks sent twice at once, like an impatient user")
+    parser.add_argument("--fsm", choices=("memory", "sqlite"), default="memory", help="FSM storage backend")
+    parser.add_argument("--compact", action="store_true", help="run quizzes in compact mode")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the outbound rate limiter on")
+    parser.add_argument("--timeout", type=float, default=15.0, help="seconds to wait for a reply")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="seconds between memory samples")
+    asyncio.run(main(parser.parse_args()))
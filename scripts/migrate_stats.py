@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of user stats from data/runtime/stats.json into the SQLite store.
+Users already present in the database are skipped, so it is safe to run again.
+Run: python3 scripts/migrate_stats.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bot.utils.loader import STATS_DB_PATH, STATS_PATH  # noqa: E402
+from bot.utils.stats_store import SqliteStatsStore, migrate_json_stats  # noqa: E402
+
+
+if __name__ == "__main__":
+    store = SqliteStatsStore()
+    try:
+        imported = migrate_json_stats(store)
+    finally:
+        store.close()
+    print(f"Imported {imported} users from {STATS_PATH.name} into {STATS_DB_PATH.name}")
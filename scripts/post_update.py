@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+POST recorded Telegram updates to a locally running webhook server
+(BOT_MODE=webhook), signed with WEBHOOK_SECRET like Telegram would.
+Each file holds one update object or a list of them.
+Run: python3 scripts/post_update.py [--url http://127.0.0.1:8080/webhook] scripts/updates/sample.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+
+import aiohttp
+from dotenv import load_dotenv
+
+
+async def post_updates(url: str, secret: str, paths: list[Path]) -> None:
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret}
+    async with aiohttp.ClientSession() as session:
+        for path in paths:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            updates = payload if isinstance(payload, list) else [payload]
+            for update in updates:
+                async with session.post(url, json=update, headers=headers) as response:
+                    print(f"{path.name} update {update.get('update_id')}: HTTP {response.status}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    port = os.getenv("WEBHOOK_PORT", "8080")
+    path = os.getenv("WEBHOOK_PATH", "/webhook")
+
+    parser = argparse.ArgumentParser(description="Replay recorded updates against the webhook.")
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("--url", default=f"http://127.0.0.1:{port}{path}")
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET", ""))
+    args = parser.parse_args()
+    asyncio.run(post_updates(args.url, args.secret, args.files))
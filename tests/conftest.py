@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# Stats and FSM databases must not touch data/runtime; set before bot modules load.
+os.environ.setdefault("RUNTIME_DIR", tempfile.mkdtemp(prefix="kielisan-tests-"))
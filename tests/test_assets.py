@@ -0,0 +1,22 @@
+from bot.handlers.content import info
+from bot.utils.loader import NUMBER_ASSETS_DIR
+
+
+def _source(number):
+    return next(NUMBER_ASSETS_DIR.glob(f"num_{number}.*"))
+
+
+def test_numbers_in_the_manifest_use_the_optimised_image(monkeypatch):
+    monkeypatch.setattr(info, "load_asset_manifest", lambda: {"7": {"path": "optimized/num_7.jpg"}})
+    assert info._find_image_path("7") == NUMBER_ASSETS_DIR / "optimized" / "num_7.jpg"
+
+
+def test_numbers_missing_from_the_manifest_fall_back_to_the_source_image(monkeypatch):
+    monkeypatch.setattr(info, "load_asset_manifest", lambda: {"7": {"path": "optimized/num_7.jpg"}})
+    assert info._find_image_path("99") == _source("99")
+
+
+def test_without_a_manifest_the_source_images_are_used(monkeypatch):
+    monkeypatch.setattr(info, "load_asset_manifest", lambda: {})
+    assert info._find_image_path("7") == _source("7")
+    assert info._find_image_path("100000") is None
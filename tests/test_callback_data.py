@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from bot.constants import STALE_BUTTON_TEXT
+from bot.handlers.callbacks import CallbackDecoder
+from bot.keyboards import callback_data
+from bot.keyboards.callback_data import CALLBACK_DATA_LIMIT, Op, Packet, StaleCallback, pack, unpack
+
+
+def _samples(field) -> list[str]:
+    if field is callback_data._NUMBER:
+        return ["0", "7", "40", "1000"]
+    if field is callback_data._TEXT:
+        return ["q01", "c17_b"]
+    return list(field._choices)
+
+
+def _cases():
+    for op, (_payload_type, fields) in callback_data._LAYOUTS.items():
+        columns = [_samples(field) for field in fields]
+        rows = max((len(column) for column in columns), default=1)
+        for row in range(rows):
+            yield op, tuple(column[row % len(column)] for column in columns)
+
+
+@pytest.mark.parametrize("op,values", list(_cases()))
+def test_pack_unpack_round_trip(op, values):
+    data = pack(op, *values)
+    assert len(data.encode("utf-8")) <= CALLBACK_DATA_LIMIT
+    packet = unpack(data)
+    assert packet.op is op
+    payload_type, _fields = callback_data._LAYOUTS[op]
+    expected = payload_type(*values) if payload_type else None
+    assert packet == Packet(op, expected)
+
+
+def test_every_opcode_has_a_layout():
+    assert set(callback_data._LAYOUTS) == set(Op)
+
+
+def test_data_from_another_version_is_stale(monkeypatch):
+    data = pack(Op.NUM_SHOW, "40")
+    monkeypatch.setattr(callback_data, "_VERSION_TAG", callback_data._DIGITS[callback_data.CALLBACK_VERSION + 1])
+    with pytest.raises(StaleCallback):
+        unpack(data)
+
+
+@pytest.mark.parametrize("data", ["num:3", "quiz_mode:short", "menu", ""])
+def test_legacy_data_is_stale(data):
+    with pytest.raises(StaleCallback):
+        unpack(data)
+
+
+@pytest.mark.parametrize("data", ["1", "1zz", "12", "12:", "12:14:extra", "1d:9"])
+def test_malformed_data_is_rejected(data):
+    with pytest.raises(ValueError) as info:
+        unpack(data)
+    assert not isinstance(info.value, StaleCallback)
+
+
+def test_data_longer_than_the_limit_is_refused():
+    header = len(pack(Op.QUIZ_SUBMIT, "q"))
+    fits = "q" * (CALLBACK_DATA_LIMIT - header + 1)
+    assert len(pack(Op.QUIZ_SUBMIT, fits)) == CALLBACK_DATA_LIMIT
+    with pytest.raises(ValueError):
+        pack(Op.QUIZ_SUBMIT, fits + "q")
+    # The limit is in bytes, not characters.
+    with pytest.raises(ValueError):
+        pack(Op.QUIZ_SUBMIT, "ә" * (len(fits) // 2 + 1))
+
+
+class Callback:
+    def __init__(self, data: str) -> None:
+        self.data = data
+        self.answers: list[tuple] = []
+
+    async def answer(self, *args, **kwargs):
+        self.answers.append((args, kwargs))
+
+
+def _decode(data: str):
+    handled = []
+
+    async def handler(event, context):
+        handled.append(context["packet"])
+
+    callback = Callback(data)
+    asyncio.run(CallbackDecoder()(handler, callback, {}))
+    return handled, callback.answers
+
+
+def test_decoder_passes_the_packet_on():
+    handled, answers = _decode(pack(Op.NUM_SHOW, "40"))
+    assert handled == [unpack(pack(Op.NUM_SHOW, "40"))]
+    assert answers == []
+
+
+def test_decoder_answers_legacy_buttons_with_a_hint():
+    handled, answers = _decode("num:3")
+    assert handled == []
+    assert answers == [((STALE_BUTTON_TEXT,), {"show_alert": True})]
+
+
+def test_decoder_acknowledges_malformed_data():
+    handled, answers = _decode("1zz")
+    assert handled == []
+    assert answers == [((), {})]
@@ -0,0 +1,43 @@
+import json
+import os
+from datetime import datetime
+
+from bot.utils.feedback_log import FeedbackJournal
+
+
+def _journal(tmp_path, max_bytes=1_000_000):
+    return FeedbackJournal(
+        path=tmp_path / "feedback.jsonl",
+        archive_dir=tmp_path / "archive",
+        legacy_path=tmp_path / "feedback.json",
+        max_bytes=max_bytes,
+    )
+
+
+def test_rotated_journal_exports_every_entry(tmp_path):
+    legacy = [{"id": -2, "text": "ескі"}, {"id": -1, "text": "old"}]
+    (tmp_path / "feedback.json").write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+    journal = _journal(tmp_path, max_bytes=200)
+    entries = [{"id": index, "text": "пікір " * 5} for index in range(20)]
+
+    for entry in entries[:10]:
+        journal.append(entry)
+    size_rotated = len(list((tmp_path / "archive").glob("feedback-*.jsonl")))
+    assert size_rotated > 1
+
+    # The active file was last written last month: the next entry rotates it.
+    now = datetime.now()
+    stamp = datetime(now.year, now.month, 1).timestamp() - 86400
+    os.utime(tmp_path / "feedback.jsonl", (stamp, stamp))
+    journal.append(entries[10])
+    assert len(list((tmp_path / "archive").glob("feedback-*.jsonl"))) == size_rotated + 1
+    assert [json.loads(line) for line in (tmp_path / "feedback.jsonl").read_text().splitlines()] == [entries[10]]
+
+    for entry in entries[11:]:
+        journal.append(entry)
+
+    # A fresh journal over the same files sees the same entries, in order.
+    assert list(_journal(tmp_path)) == legacy + entries
+    assert journal.export(tmp_path / "feedback.json") == len(legacy) + len(entries)
+    exported = json.loads((tmp_path / "feedback.json").read_text(encoding="utf-8"))
+    assert exported == legacy + entries
@@ -0,0 +1,67 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendPhoto
+
+from bot.handlers.content import info
+from bot.utils.loader import FILE_IDS_PATH, load_file_ids, update_file_ids
+from bot.utils.persistence import io_worker
+
+IMAGE = Path("num_7.png")
+
+
+class PhotoMessage:
+    """Answers answer_photo; a cached file_id fails with `error` if set."""
+
+    def __init__(self, error: str = "") -> None:
+        self.error = error
+        self.sent: list = []
+
+    async def answer_photo(self, photo, **kwargs):
+        self.sent.append(photo)
+        if isinstance(photo, str) and self.error:
+            raise TelegramBadRequest(method=SendPhoto(chat_id=1, photo=photo), message=self.error)
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="uploaded")])
+
+
+@pytest.fixture(autouse=True)
+def empty_file_ids():
+    FILE_IDS_PATH.unlink(missing_ok=True)
+    info._file_ids = None
+    yield
+    FILE_IDS_PATH.unlink(missing_ok=True)
+    info._file_ids = None
+
+
+async def _send(message: PhotoMessage) -> None:
+    try:
+        await info._answer_photo(message, IMAGE, caption="x")
+    finally:
+        await io_worker.close()
+
+
+def test_stale_file_id_is_replaced_by_a_new_upload():
+    update_file_ids({IMAGE.name: "old"})
+    message = PhotoMessage("Bad Request: wrong file identifier/HTTP URL specified")
+    asyncio.run(_send(message))
+    assert message.sent[0] == "old"
+    assert load_file_ids() == {IMAGE.name: "uploaded"}
+
+
+def test_other_bad_requests_keep_the_cached_file_id():
+    update_file_ids({IMAGE.name: "old"})
+    message = PhotoMessage("Bad Request: message caption is too long")
+    with pytest.raises(TelegramBadRequest):
+        asyncio.run(_send(message))
+    assert message.sent == ["old"]
+    assert load_file_ids() == {IMAGE.name: "old"}
+
+
+def test_update_keeps_ids_saved_by_other_workers():
+    update_file_ids({"num_1.png": "a"})
+    # Another worker saved an id after this one loaded the file.
+    update_file_ids({"num_2.png": "b"})
+    assert update_file_ids({"num_1.png": None}) == {"num_2.png": "b"}
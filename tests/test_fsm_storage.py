@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from bot.utils import fsm_storage
+from bot.utils.fsm_storage import (
+    BoundedMemoryStorage,
+    SqliteStorage,
+    UserEventIsolation,
+    create_event_isolation,
+)
+from bot.utils.persistence import io_worker
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+TTL = 60
+
+
+class Clock:
+    """Stands in for the `time` module; `now` moves only when told to."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fsm_storage, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def create_storage(request, tmp_path):
+    if request.param == "memory":
+        return lambda: BoundedMemoryStorage(idle_ttl=TTL)
+    return lambda: SqliteStorage(tmp_path / "fsm.db", ttl=TTL)
+
+
+def _run(create_storage, scenario):
+    async def run():
+        storage = create_storage()
+        try:
+            return await scenario(storage)
+        finally:
+            await storage.close()
+            await io_worker.close()
+
+    return asyncio.run(run())
+
+
+def test_session_expires_after_ttl(create_storage, clock):
+    async def scenario(storage):
+        await storage.set_state(KEY, "Quiz:answer")
+        await storage.set_data(KEY, {"score": 3})
+        clock.now += TTL - 1
+        fresh = await storage.get_state(KEY), await storage.get_data(KEY)
+        clock.now += TTL + 1
+        return fresh, (await storage.get_state(KEY), await storage.get_data(KEY))
+
+    fresh, expired = _run(create_storage, scenario)
+    assert fresh == ("Quiz:answer", {"score": 3})
+    assert expired == (None, {})
+
+
+def test_writing_to_an_expired_session_starts_empty(create_storage, clock):
+    async def scenario(storage):
+        await storage.set_state(KEY, "Quiz:answer")
+        await storage.set_data(KEY, {"score": 3})
+        clock.now += TTL + 1
+        await storage.set_state(KEY, "Quiz:menu")
+        after_state = await storage.get_data(KEY)
+        clock.now += TTL + 1
+        await storage.set_data(KEY, {"score": 0})
+        return after_state, await storage.get_state(KEY)
+
+    data, state = _run(create_storage, scenario)
+    assert data == {}
+    assert state is None
+
+
+def test_local_storages_use_the_in_process_lock(tmp_path):
+    assert isinstance(create_event_isolation(BoundedMemoryStorage()), UserEventIsolation)
+    storage = SqliteStorage(tmp_path / "fsm.db")
+    assert isinstance(create_event_isolation(storage), UserEventIsolation)
+    asyncio.run(storage.close())
+
+
+def test_redis_storage_locks_in_redis():
+    redis = pytest.importorskip("aiogram.fsm.storage.redis")
+    storage = redis.RedisStorage.from_url("redis://localhost:6379/0")
+    assert isinstance(create_event_isolation(storage), redis.RedisEventIsolation)
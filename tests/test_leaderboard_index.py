@@ -0,0 +1,53 @@
+import random
+
+from bot.utils.leaderboard_index import LeaderboardIndex
+
+
+def _stats(points, correct=0, quizzes=0):
+    return {"total_points": points, "total_correct": correct, "quizzes_taken": quizzes}
+
+
+def test_rank_orders_by_points_then_correct_then_quizzes():
+    index = LeaderboardIndex()
+    index.rebuild([
+        ("a", _stats(10, 5, 2)),
+        ("b", _stats(20)),
+        ("c", _stats(10, 6, 1)),
+        ("d", _stats(10, 5, 3)),
+    ])
+    assert [entry.user_id for entry in index.top(10)] == ["b", "c", "d", "a"]
+    assert [index.rank(user_id) for user_id in "abcd"] == [4, 1, 2, 3]
+    assert index.rank("missing") is None
+
+
+def test_ties_are_broken_by_user_id():
+    index = LeaderboardIndex()
+    for user_id in ["30", "10", "20"]:
+        index.update(user_id, _stats(5, 5, 5))
+    assert [entry.user_id for entry in index.top(3)] == ["10", "20", "30"]
+    assert index.rank("20") == 2
+
+
+def test_updates_match_a_full_sort():
+    rng = random.Random(7)
+    index = LeaderboardIndex()
+    current = {}
+    for _ in range(2000):
+        user_id = str(rng.randint(1, 60))
+        stats = _stats(rng.randint(0, 30), rng.randint(0, 5), rng.randint(0, 3))
+        current[user_id] = stats
+        index.update(user_id, stats)
+
+    expected = sorted(
+        current,
+        key=lambda user_id: (
+            -current[user_id]["total_points"],
+            -current[user_id]["total_correct"],
+            -current[user_id]["quizzes_taken"],
+            user_id,
+        ),
+    )
+    assert len(index) == len(current)
+    assert [entry.user_id for entry in index.top(len(current))] == expected
+    assert all(index.rank(user_id) == position for position, user_id in enumerate(expected, 1))
+    assert all(index.get(user_id).stats == stats for user_id, stats in current.items())
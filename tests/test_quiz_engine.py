@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Update
+
+from bot.app import create_bot, create_dispatcher
+from bot.config import Settings
+from bot.keyboards.callback_data import Op, pack
+from bot.states.quiz import QuizStates
+from bot.utils import stats_aggregator
+from bot.utils.fsm_storage import BoundedMemoryStorage, SqliteStorage
+from bot.utils.loader import load_question_bank
+from bot.utils.persistence import io_worker
+from scripts._fake_session import FakeSession
+
+USER_ID = 1001
+
+
+class RecordingAggregator:
+    """Counts finished quizzes; yields like the real one does for its I/O."""
+
+    def __init__(self) -> None:
+        self.recorded = 0
+
+    async def record_quiz(self, user_id, result):
+        await asyncio.sleep(0.01)
+        self.recorded += 1
+        return {}
+
+
+def _answer_update(update_id: int, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": USER_ID, "is_bot": False, "first_name": "User"},
+            "chat_instance": "test",
+            "message": {"message_id": 1, "date": 0, "chat": {"id": USER_ID, "type": "private"}, "text": "q"},
+            "data": data,
+        },
+    })
+
+
+def _single_answer_question() -> tuple[str, str]:
+    bank = load_question_bank()
+    for question_id in bank.ids():
+        correct = bank.get(question_id)["correct"]
+        if len(correct) == 1:
+            return question_id, correct[0]
+    raise AssertionError("no single-answer question in the bank")
+
+
+@pytest.fixture(scope="module")
+def bot_and_dispatcher():
+    # The handler routers can only be attached to one dispatcher per process.
+    settings = Settings(bot_token="42:TEST", rate_limit=False)
+    return create_bot(settings, FakeSession()), create_dispatcher(settings)
+
+
+async def _tap_last_answer_twice(bot: Bot, dp: Dispatcher) -> int:
+    question_id, option = _single_answer_question()
+    key = StorageKey(bot_id=bot.id, chat_id=USER_ID, user_id=USER_ID)
+    await dp.storage.set_state(key, QuizStates.in_quiz)
+    await dp.storage.set_data(key, {"mode": "mixed", "question_ids": [question_id], "current_index": 0})
+
+    aggregator = RecordingAggregator()
+    stats_aggregator._aggregator = aggregator
+    try:
+        data = pack(Op.QUIZ_ANSWER, question_id, option)
+        await asyncio.gather(
+            dp.feed_update(bot, _answer_update(1, data)),
+            dp.feed_update(bot, _answer_update(2, data)),
+        )
+    finally:
+        stats_aggregator._aggregator = None
+        await dp.storage.close()
+        await io_worker.close()
+    return aggregator.recorded
+
+
+@pytest.mark.parametrize("create_storage", [BoundedMemoryStorage, SqliteStorage], ids=["memory", "sqlite"])
+def test_double_tap_on_last_answer_records_quiz_once(bot_and_dispatcher, create_storage):
+    bot, dp = bot_and_dispatcher
+    dp.fsm.storage = create_storage()
+    assert asyncio.run(_tap_last_answer_twice(bot, dp)) == 1
@@ -0,0 +1,58 @@
+import asyncio
+
+from bot.sharding import _OrderedFeeder
+
+
+class GatedDispatcher:
+    """Records updates in handling order; user 1's updates block until released."""
+
+    def __init__(self) -> None:
+        self.handled: list[tuple[int, int]] = []
+        self.release = asyncio.Event()
+
+    async def feed_raw_update(self, bot, update):
+        if update["user"] == 1:
+            await self.release.wait()
+        self.handled.append((update["user"], update["update_id"]))
+
+
+def test_burst_from_one_user_does_not_hold_other_users_back():
+    async def run():
+        dp = GatedDispatcher()
+        feeder = _OrderedFeeder(dp, bot=None, max_in_flight=2, max_queued=100)
+        for update_id in range(20):
+            await feeder.submit(1, {"user": 1, "update_id": update_id})
+        for update_id in range(20, 25):
+            await feeder.submit(2, {"user": 2, "update_id": update_id})
+        await asyncio.wait_for(_until(lambda: len(dp.handled) == 5), timeout=1)
+        assert dp.handled == [(2, update_id) for update_id in range(20, 25)]
+
+        dp.release.set()
+        await feeder.drain()
+        assert [update_id for user, update_id in dp.handled if user == 1] == list(range(20))
+
+    asyncio.run(run())
+
+
+def test_submit_waits_once_the_queue_is_full():
+    async def run():
+        dp = GatedDispatcher()
+        feeder = _OrderedFeeder(dp, bot=None, max_in_flight=2, max_queued=3)
+        for update_id in range(4):
+            await feeder.submit(1, {"user": 1, "update_id": update_id})
+        # One update is running; three are queued.
+        blocked = asyncio.create_task(feeder.submit(1, {"user": 1, "update_id": 4}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        dp.release.set()
+        await blocked
+        await feeder.drain()
+        assert dp.handled == [(1, update_id) for update_id in range(5)]
+
+    asyncio.run(run())
+
+
+async def _until(condition) -> None:
+    while not condition():
+        await asyncio.sleep(0)
@@ -0,0 +1,106 @@
+import asyncio
+import random
+
+import pytest
+
+from bot.utils.persistence import io_worker
+from bot.utils.stats_aggregator import StatsAggregator
+from bot.utils.stats_store import QuizResult, SqliteStatsStore, apply_quiz_result
+
+
+class FailingStore:
+    """SqliteStatsStore whose next `fail` writes raise before touching the file."""
+
+    def __init__(self, store: SqliteStatsStore, fail: int = 0) -> None:
+        self.store = store
+        self.fail = fail
+
+    def get(self, user_id):
+        return self.store.get(user_id)
+
+    def all(self):
+        return self.store.all()
+
+    def add_many(self, deltas):
+        if self.fail:
+            self.fail -= 1
+            raise OSError("disk full")
+        self.store.add_many(deltas)
+
+    def close(self):
+        self.store.close()
+
+
+def _results(count: int, seed: int = 1) -> list[tuple[str, QuizResult]]:
+    rng = random.Random(seed)
+    results = []
+    for index in range(count):
+        total = rng.choice([0, 2, 4, 5, 10])
+        correct = rng.randint(0, total)
+        result = QuizResult(
+            correct=correct,
+            total=total,
+            mode=rng.choice(["quiz", "compare"]),
+            points=rng.randint(-5, 50),
+            finished_at=f"2026-10-{index % 28 + 1:02d}",
+            display_name=f"name {index}",
+        )
+        results.append((f"user{rng.randint(1, 5)}", result))
+    return results
+
+
+def _expected(results) -> dict[str, dict]:
+    stats: dict[str, dict] = {}
+    for user_id, result in results:
+        stats[user_id] = apply_quiz_result(stats.get(user_id), result)
+    return stats
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteStatsStore(tmp_path / "stats.db")
+    yield store
+    store.close()
+
+
+def test_flushed_totals_match_sequential_results(store):
+    results = _results(300)
+
+    async def run():
+        aggregator = StatsAggregator(store)
+        try:
+            for index, (user_id, result) in enumerate(results):
+                await aggregator.record_quiz(user_id, result)
+                if index % 37 == 0:
+                    await aggregator.flush()
+            await aggregator.flush()
+        finally:
+            await io_worker.close()
+
+    asyncio.run(run())
+    assert store.all() == _expected(results)
+
+
+def test_failed_flush_keeps_the_deltas(store):
+    results = _results(40)
+    failing = FailingStore(store, fail=1)
+
+    async def run():
+        aggregator = StatsAggregator(failing)
+        try:
+            for user_id, result in results[:20]:
+                await aggregator.record_quiz(user_id, result)
+            with pytest.raises(OSError):
+                await aggregator.flush()
+            assert store.all() == {}
+            # Served from memory until the retry succeeds.
+            user_id = results[0][0]
+            assert await aggregator.get(user_id) == _expected(results[:20])[user_id]
+            for user_id, result in results[20:]:
+                await aggregator.record_quiz(user_id, result)
+            await aggregator.flush()
+        finally:
+            await io_worker.close()
+
+    asyncio.run(run())
+    assert store.all() == _expected(results)